@@ -4,8 +4,12 @@ import numpy as np
 import math
 import threading
 import sys
+from frame import Frame
+from clipping import clip_frame
+from simplify import simplify_frame
+from tiling import TileGrid
 from display_qt import DisplayQT
-from display_web import DisplayWeb
+from display_web_async import DisplayWebAsync
 # from PySide6.QtWidgets import QApplication
 
 class BasicRenderer:
@@ -19,6 +23,14 @@ class BasicRenderer:
     - Render irregular polygons.
     - Render splines.
     - Apply binary dropouts (if specified) to line segments or splines.
+    - Clip and cull each frame against the canvas before it is sent to the displays.
+    - Simplify polylines to a tolerance or a per-frame vertex budget (level of detail).
+    - Split the canvas into tiles so each display only renders the geometry that touches it.
+
+    Drawing calls between frame_start and frame_end are written straight into
+    the typed arrays of a Frame, each primitive tagged with the current style.
+    On frame_end the whole frame is clipped at once and only then fanned out to
+    every display, so no display spends time or bandwidth on off-canvas geometry.
     """
 
     def __init__(self):
@@ -27,46 +39,162 @@ class BasicRenderer:
 
         # Store important canvas parameters
         self.canvas_width, self.canvas_height = config.QT["canvas_size"]
+        self.canvas_bounds = (0, 0, self.canvas_width, self.canvas_height)
+        self.clipping_on = config.RENDERER["clipping_on"]
 
-    def add_display(self, display):
+        # Level of detail, the error of the last simplified frame is kept for reporting
+        self.simplify_tolerance = config.RENDERER["simplify_tolerance"]
+        self.vertex_budget = config.RENDERER["vertex_budget"]
+        self.simplify_error = 0.0
+
+        # Tiling, maps each tiled display to its tile index (untiled displays get the whole canvas)
+        self.tile_grid = None
+        self.display_tiles = {}
+
+        # Current stroke style, applied to everything drawn from now on
+        self.stroke_color = config.QT["default_stroke_color"] + (config.QT["default_alpha"],)
+        self.stroke_width = config.QT["default_stroke_width"]
+
+        # The frame currently being drawn
+        self.new_frame()
+
+    def add_display(self, display, tile=None):
         """
         Add a display class instance to the list of display classes.
         Start the display in a separate thread.
+
+        :param tile: Index of the tile this display shows when tiling is set,
+            or None to show the whole canvas.
         """
+        if tile is not None and self.tile_grid is not None:
+            self.check_tile(tile)
         # thread = threading.Thread(target=display.start)
         # thread.start()
         display.start()  # Assumes display.start() is already non-blocking
         self.displays.append(display)
+        if tile is not None:
+            self.display_tiles[display] = tile
+
+    def set_tiling(self, cols, rows, overlap=0, output_size=None):
+        """
+        Split the canvas into cols x rows tiles. Tiles are numbered row by row and
+        each one is scaled uniformly onto the canvas of the display bound to it.
+
+        :param overlap: Canvas units each tile extends into its neighbours for edge blending.
+        :param output_size: (width, height) of the tiled displays' canvases, defaults
+            to the canvas size. Pick the tiles' aspect ratio to avoid letterboxing.
+        """
+        canvas_size = (self.canvas_width, self.canvas_height)
+        tile_grid = TileGrid(canvas_size, cols, rows, overlap, output_size)
+        for tile in self.display_tiles.values():
+            self.check_tile(tile, tile_grid)
+        self.tile_grid = tile_grid
+
+    def check_tile(self, tile, tile_grid=None):
+        """
+        Raise ValueError if tile is not a tile index of the grid.
+        """
+        tile_grid = tile_grid or self.tile_grid
+        if not 0 <= tile < len(tile_grid.tiles):
+            raise ValueError(f"Tile {tile} is not in the {tile_grid.cols} x {tile_grid.rows} tile grid")
     
     def execute_command(self, command, *args):
         """
         Directly call a method on all displays corresponding to the command.
         """
         for display in self.displays:
-            # Check if the display has the method corresponding to the command
-            if hasattr(display, command):
-                method = getattr(display, command)
-                if callable(method):
-                    # Call the method with args
-                    method(*args)
-            else:
-                print(f"Display does not support command: {command}")
+            self.execute_on_display(display, command, *args)
 
-    # Specific drawing methods can utilize the generic execute_on_all_displays
+    def execute_on_display(self, display, command, *args):
+        """
+        Call the method corresponding to the command on a single display.
+        """
+        # Check if the display has the method corresponding to the command
+        if hasattr(display, command):
+            method = getattr(display, command)
+            if callable(method):
+                # Call the method with args
+                method(*args)
+        else:
+            print(f"Display does not support command: {command}")
+
+    # Drawing methods record into the current frame, which is sent out on frame_end
     def frame_start(self):
-        self.execute_command('frame_start')
+        # frame_end already left an empty frame, only drop what was drawn since
+        if any(self.frame.counts.values()):
+            self.new_frame(self.frame.sizes())
 
     def frame_end(self):
-        self.execute_command('frame_end')
+        frame = self.frame.finalize()
+        # Displays may hold on to the finished frame, so draw the next one into new buffers
+        # sized like this one so they rarely have to grow
+        self.new_frame(frame.sizes())
+        if self.clipping_on:
+            frame = clip_frame(frame, self.canvas_bounds)
+        if self.simplify_tolerance is not None or self.vertex_budget is not None:
+            frame, self.simplify_error = simplify_frame(frame, self.simplify_tolerance, self.vertex_budget)
+        tile_frames = {}
+        if self.tile_grid is not None and self.display_tiles:
+            tile_frames = self.tile_grid.route(frame, set(self.display_tiles.values()))
+        for display in self.displays:
+            if display in self.display_tiles and self.tile_grid is not None:
+                self.send_frame(display, tile_frames[self.display_tiles[display]])
+            else:
+                self.send_frame(display, frame)
+
+    def new_frame(self, sizes=None):
+        self.frame = Frame(sizes)
+        self.frame.set_style(self.stroke_color, self.stroke_width)
+
+    def set_stroke_color(self, r, g, b, a=config.QT["default_alpha"]):
+        self.stroke_color = (r, g, b, a)
+        self.frame.set_style(self.stroke_color, self.stroke_width)
+
+    def set_stroke_width(self, width):
+        self.stroke_width = width
+        self.frame.set_style(self.stroke_color, self.stroke_width)
 
     def draw_point(self, p0):
-        self.execute_command('draw_point', p0)
+        self.frame.add_point(p0)
 
     def draw_line(self, p0, p1):
-        self.execute_command('draw_line', p0, p1)
+        self.frame.add_line(p0, p1)
 
     def draw_cubic_bezier(self, p0, p1, p2, p3):
-        self.execute_command('draw_cubic_bezier', p0, p1, p2, p3)
+        self.frame.add_cubic_bezier(p0, p1, p2, p3)
+
+    def draw_polyline(self, points, importance=1.0):
+        self.frame.add_polyline(points, importance)
+
+    def set_level_of_detail(self, tolerance=None, vertex_budget=None):
+        """
+        Set how much polylines are simplified before they are sent to the displays.
+
+        :param tolerance: Maximum deviation in canvas units, or None.
+        :param vertex_budget: Maximum number of vertices per frame, or None.
+        """
+        self.simplify_tolerance = tolerance
+        self.vertex_budget = vertex_budget
+        self.simplify_error = 0.0
+
+    def send_frame(self, display, frame):
+        """
+        Send a finalized frame to a single display. Displays that accept whole frames
+        get it in one call, others get a sequence of drawing commands.
+        """
+        if hasattr(display, 'draw_frame'):
+            display.draw_frame(frame)
+            return
+        self.execute_on_display(display, 'frame_start')
+        for x, y in frame.points.tolist():
+            self.execute_on_display(display, 'draw_point', [x, y])
+        for x0, y0, x1, y1 in frame.lines.tolist():
+            self.execute_on_display(display, 'draw_line', [x0, y0], [x1, y1])
+        for x0, y0, x1, y1, x2, y2, x3, y3 in frame.beziers.tolist():
+            self.execute_on_display(display, 'draw_cubic_bezier', [x0, y0], [x1, y1], [x2, y2], [x3, y3])
+        for polyline in frame.iter_polylines():
+            self.execute_on_display(display, 'draw_polyline', polyline.tolist())
+        self.execute_on_display(display, 'frame_end')
 
 
     def apply_binary_dropout(self, element):
@@ -134,14 +262,14 @@ class BasicRenderer:
             new_p0 = self.rotate_point(p0, center_x, center_y, self.rotation_angles[index])
             new_p1 = self.rotate_point(p1, center_x, center_y, self.rotation_angles[index])
 
-            # Bound the new points within the canvas
-            self.test_lines[index] = [self.bound_point(new_p0), self.bound_point(new_p1)]
+            # Off-canvas parts are clipped on frame_end
+            self.test_lines[index] = [new_p0, new_p1]
 
         # Redraw elements on all displays
-        self.execute_command('frame_reset')  # Clears the screen
+        self.frame_start()  # Clears the screen
         for line in self.test_lines:
-            self.execute_command('draw_line', line[0], line[1])
-        self.execute_command('frame_complete')
+            self.draw_line(line[0], line[1])
+        self.frame_end()
 
     def rotate_point(self, point, cx, cy, angle):
         """
@@ -153,13 +281,6 @@ class BasicRenderer:
         new_y = x * s + y * c
         return [new_x + cx, new_y + cy]
 
-    def bound_point(self, point):
-        """
-        Ensure the point stays within the canvas bounds.
-        """
-        x, y = point
-        return [max(0, min(self.canvas_width, x)), max(0, min(self.canvas_height, y))]
-
 
 
 if __name__ == "__main__":
@@ -171,7 +292,7 @@ if __name__ == "__main__":
     # Instantiate DisplayQT and add the display to the BasicRenderer
     # display_qt = DisplayQT()
     # renderer.add_display(display_qt)
-    display_web = DisplayWeb()
+    display_web = DisplayWebAsync()
     renderer.add_display(display_web)
     print("Display added")
 
@@ -183,4 +304,5 @@ if __name__ == "__main__":
     renderer.draw_line([300, 100], [100, 300])
     renderer.draw_line([200, 50], [200, 350])
     renderer.draw_line([50, 200], [350, 200])
+    renderer.frame_end()
 
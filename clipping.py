@@ -0,0 +1,156 @@
+"""
+Canvas clipping and off-canvas culling.
+
+All functions work on whole-frame arrays at once. Bounds are given as
+(xmin, ymin, xmax, ymax).
+- Line segments are clipped with Liang–Barsky so that geometry is cut at the
+  canvas edge instead of having each endpoint clamped independently.
+- Points are kept only if they are on the canvas.
+- Beziers and polylines are rejected when their bounding box misses the canvas.
+  Beziers use the box around their control points, which always contains the
+  curve. Anything partly on the canvas is passed through whole.
+"""
+
+import numpy as np
+
+
+def liang_barsky(starts, ends, bounds):
+    """
+    Compute Liang–Barsky clip parameters for a batch of segments.
+
+    :param starts: (N, 2) array of segment start points.
+    :param ends: (N, 2) array of segment end points.
+    :param bounds: Clip rectangle as (xmin, ymin, xmax, ymax).
+    :return: (t0, t1, keep) where t0 and t1 are the parametric entry and exit
+        positions along each segment and keep is a boolean mask of segments
+        that have some part inside the rectangle.
+    """
+    xmin, ymin, xmax, ymax = bounds
+    x0, y0 = starts[:, 0], starts[:, 1]
+    dx, dy = ends[:, 0] - x0, ends[:, 1] - y0
+
+    p = np.stack((-dx, dx, -dy, dy))
+    q = np.stack((x0 - xmin, xmax - x0, y0 - ymin, ymax - y0))
+
+    # Segments parallel to an edge and outside it can never be visible
+    outside = np.any((p == 0) & (q < 0), axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = q / p
+    t0 = np.max(np.where(p < 0, r, 0.0), axis=0, initial=0.0)
+    t1 = np.min(np.where(p > 0, r, 1.0), axis=0, initial=1.0)
+
+    keep = ~outside & (t0 <= t1)
+    return t0, t1, keep
+
+
+def clip_lines(lines, bounds):
+    """
+    Clip line segments to a rectangle.
+
+    :param lines: (N, 4) array of [x0, y0, x1, y1].
+    :param bounds: Clip rectangle as (xmin, ymin, xmax, ymax).
+    :return: (clipped, keep) where clipped is an (M, 4) array of the visible
+        parts of the kept segments and keep is the (N,) boolean mask.
+    """
+    starts, ends = lines[:, 0:2], lines[:, 2:4]
+    t0, t1, keep = liang_barsky(starts, ends, bounds)
+    delta = ends - starts
+    clipped = np.hstack((starts + t0[:, None] * delta, starts + t1[:, None] * delta))
+    return clipped[keep], keep
+
+
+def points_visible(points, bounds):
+    """
+    Return a boolean mask of the (N, 2) points that lie inside bounds.
+    """
+    xmin, ymin, xmax, ymax = bounds
+    x, y = points[:, 0], points[:, 1]
+    return (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+
+
+def boxes_visible(mins, maxs, bounds):
+    """
+    Return a boolean mask of the boxes, given as (N, 2) min and max corners,
+    that overlap bounds.
+    """
+    xmin, ymin, xmax, ymax = bounds
+    return (maxs[:, 0] >= xmin) & (mins[:, 0] <= xmax) & (maxs[:, 1] >= ymin) & (mins[:, 1] <= ymax)
+
+
+def bezier_boxes(beziers):
+    """
+    Return the (min, max) corners of the control point box of each (N, 8) bezier.
+    """
+    control_points = beziers.reshape(-1, 4, 2)
+    return control_points.min(axis=1), control_points.max(axis=1)
+
+
+def polyline_boxes(vertices, offsets):
+    """
+    Return the (min, max) corners of the bounding box of each polyline.
+    """
+    if len(offsets) < 2:
+        return np.empty((0, 2)), np.empty((0, 2))
+    return np.minimum.reduceat(vertices, offsets[:-1]), np.maximum.reduceat(vertices, offsets[:-1])
+
+
+def clip_frame(frame, bounds):
+    """
+    Clip and cull every primitive of a finalized frame against bounds.
+
+    :param frame: A finalized Frame.
+    :param bounds: Clip rectangle as (xmin, ymin, xmax, ymax).
+    :return: A new Frame holding only visible geometry.
+    """
+    lines, keep = clip_lines(frame.lines, bounds)
+    visible = frame.select(
+        points=points_visible(frame.points, bounds),
+        beziers=boxes_visible(*bezier_boxes(frame.beziers), bounds),
+        polylines=boxes_visible(*polyline_boxes(frame.polyline_vertices, frame.polyline_offsets), bounds))
+    return visible.replace(lines=lines, line_styles=frame.line_styles[keep])
+
+
+def clip_polylines(vertices, offsets, bounds):
+    """
+    Clip polylines to a rectangle, splitting them where they leave and re-enter it.
+
+    Every segment is clipped with Liang–Barsky. Consecutive visible segments
+    that meet inside the rectangle are joined back into one polyline, anything
+    else starts a new one.
+
+    :param vertices: (M, 2) array of all polyline vertices.
+    :param offsets: (K + 1,) array, polyline k is vertices[offsets[k]:offsets[k + 1]].
+    :param bounds: Clip rectangle as (xmin, ymin, xmax, ymax).
+    :return: (vertices, offsets, source) of the visible pieces, source holding
+        the index of the polyline each piece was cut from.
+    """
+    lengths = np.diff(offsets)
+    polyline_ids = np.repeat(np.arange(len(lengths)), lengths)
+    empty = np.empty((0, 2), dtype=vertices.dtype), np.zeros(1, dtype=int), np.empty(0, dtype=int)
+    if len(vertices) < 2:
+        return empty
+
+    # Segment i runs from vertex i to vertex i + 1 within the same polyline
+    starts, ends = vertices[:-1], vertices[1:]
+    same_polyline = polyline_ids[:-1] == polyline_ids[1:]
+    t0, t1, keep = liang_barsky(starts, ends, bounds)
+    segments = np.flatnonzero(keep & same_polyline)
+    if len(segments) == 0:
+        return empty
+
+    # A segment continues the previous piece if both share an unclipped vertex
+    continues = np.zeros(len(segments), dtype=bool)
+    continues[1:] = (segments[1:] == segments[:-1] + 1) & (t1[segments[:-1]] == 1) & (t0[segments[1:]] == 0)
+    starts_piece = ~continues
+
+    delta = ends[segments] - starts[segments]
+    clipped = np.stack((starts[segments] + t0[segments, None] * delta,
+                        starts[segments] + t1[segments, None] * delta), axis=1)
+
+    # Each piece emits its first clipped start, then the clipped end of every segment
+    emit = np.stack((starts_piece, np.ones(len(segments), dtype=bool)), axis=1)
+    piece_ids = np.cumsum(starts_piece) - 1
+    piece_lengths = np.bincount(piece_ids) + 1
+    piece_offsets = np.concatenate(([0], np.cumsum(piece_lengths))).astype(int)
+    return clipped[emit], piece_offsets, polyline_ids[segments[starts_piece]]
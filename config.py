@@ -1,6 +1,30 @@
 
 from PySide6.QtGui import QColor
 
+# VISUAL_COMPOSER
+COMPOSER = {
+    "frame_rate": 60,  # Frames per second sent to the displays
+    "keyframe_rate": 20,  # Times per second the pattern generator is evaluated
+    "interpolation": "eased"  # 'linear', 'eased' or 'spline'
+}
+
+# BASIC_RENDERER
+RENDERER = {
+    "clipping_on": True,  # Clip and cull each frame against the canvas before fan-out
+    "simplify_tolerance": None,  # Max polyline deviation in canvas units, None to disable
+    "vertex_budget": None  # Max vertices per frame, None to disable
+}
+
+# REMOTE_DISPLAY and RENDER_NODE
+REMOTE = {
+    "host": "127.0.0.1",
+    "port": 7000,
+    "heartbeat_interval": 0.5,  # Seconds between pings
+    "heartbeat_timeout": 2.0,  # Drop the connection after this long without a message
+    "reconnect_delay": 0.5,  # First reconnect delay, doubled on each failure
+    "max_reconnect_delay": 5.0
+}
+
 # DISPLAY_QT
 QT = {
     "canvas_size": (2000, 1125),  # 16:9 ratio
@@ -16,11 +40,18 @@ QT = {
     "default_stroke_width": 2,
     "default_alpha": 255,
     "point_size": 2,
-    "hotspot_size": 5
+    "hotspot_size": 5,
+    "hotspot_merge_radius": 4,  # Hotspots closer than this are drawn as one
+    "hotspot_weighting_on": False,  # Merged hotspots get brighter with the number merged
+    "hotspot_base_opacity": 0.7,  # Opacity of a hotspot that merged nothing when weighting is on
+    "sprite_cache_size": 64,  # Pre-rendered point and hotspot looks kept, least recently used evicted first
+    "sprite_z_value": 1  # Points and hotspots are drawn above lines and curves
 }
 
 # DISPLAY_WEB
 WEB = {
+    "host": "127.0.0.1",
+    "port": 5000,
     "canvas_size": (2000, 1125),  # 16:9 ratio
     "min_win_size": (640, 480),
     "bkgd_color": (0, 0, 0),
@@ -0,0 +1,42 @@
+import time
+
+
+class DisplayHeadless:
+    """
+    DisplayHeadless is a display without any output. It accepts frames like any
+    other display and keeps simple statistics, which makes it useful for render
+    nodes without a screen and for measuring the rendering pipeline.
+
+    Responsibilities:
+    - Accept whole frames from a BasicRenderer or a render node.
+    - Keep the last frame and count frames and primitives.
+    """
+
+    def __init__(self, name="headless"):
+        self.name = name
+        self.last_frame = None
+        self.frame_count = 0
+        self.primitive_count = 0
+        self.started_at = None
+
+    def start(self):
+        self.started_at = time.time()
+
+    def draw_frame(self, frame):
+        """
+        Record a finalized frame.
+        """
+        self.last_frame = frame
+        self.frame_count += 1
+        self.primitive_count += frame.primitive_count()
+
+    def stats(self):
+        """
+        Return a dict of frame statistics since start.
+        """
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        return {
+            'frames': self.frame_count,
+            'primitives': self.primitive_count,
+            'fps': self.frame_count / elapsed if elapsed > 0 else 0.0,
+        }
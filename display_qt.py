@@ -5,6 +5,10 @@ import config
 import numpy as np
 import random
 import math
+from clipping import clip_lines
+from hotspots import cluster_points, hotspot_brightness, segment_intersections
+from frame import Frame
+from sprites import SpriteCache, SpriteBatch
 
 # everything we need from PySide6
 from PySide6.QtWidgets import (
@@ -12,7 +16,7 @@ from PySide6.QtWidgets import (
     QGraphicsScene, QGraphicsRectItem, QGraphicsLineItem, QGraphicsEllipseItem,
     QGraphicsPathItem, QGraphicsDropShadowEffect, QSizePolicy
 )
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, QRectF
 from PySide6.QtGui import QResizeEvent, QColor, QPen, QPainterPath
 
 
@@ -89,10 +93,14 @@ class DisplayQT:
         # Default colors for stroke and fill
         self.stroke_color = QColor(*config.QT["default_stroke_color"]) 
         self.fill_color = QColor(*config.QT["default_fill_color"])
+        self.stroke_width = config.QT["default_stroke_width"]
         self.color_fringing_on = config.QT["color_fringing_on"]  # Boolean for whether the laser glow effect is on
         self.fringing_color = QColor(*config.QT["fringing_color"]) 
 
-        # Initialize an array to record each line, point, spline, or square
+        # Pre-rendered points and hotspots, one sprite per look
+        self.sprites = SpriteCache(config.QT["sprite_cache_size"])
+
+        # Initialize a frame to record each line, point, spline, or square
         # and clear the screen
         self.frame_reset()
 
@@ -110,7 +118,7 @@ class DisplayQT:
 
     def frame_reset(self):
         """
-        Clears the screen to the background color and initializes an array for recording graphical elements.
+        Clears the screen to the background color and initializes a frame for recording graphical elements.
         """
         # Clear the scene
         self.scene.clear()
@@ -118,8 +126,18 @@ class DisplayQT:
         # Set the background color
         self.scene.setBackgroundBrush(QColor(*config.QT["bkgd_color"]))
 
-        # clear the elements array
-        self.elements_array = []
+        # clear the recorded elements
+        self.frame = Frame()
+
+        # Points and hotspots of this frame are all blitted by one item, their glows
+        # by another one under the lines
+        canvas = QRectF(0, 0, self.canvas_width, self.canvas_height)
+        self.sprite_batch = SpriteBatch(canvas)
+        self.sprite_batch.setZValue(config.QT["sprite_z_value"])
+        self.scene.addItem(self.sprite_batch)
+        self.glow_batch = SpriteBatch(canvas)
+        self.glow_batch.setZValue(config.QT["fringe_z_value"])
+        self.scene.addItem(self.glow_batch)
 
     def set_stroke_color(self, r, g, b, a=config.QT["default_alpha"]):
         """
@@ -127,36 +145,79 @@ class DisplayQT:
         """
         self.stroke_color = QColor(r, g, b, a)
 
+    def set_stroke_width(self, width):
+        """
+        Set the stroke width for drawing lines and curves.
+        """
+        self.stroke_width = width
+
     def set_fill_color(self, r, g, b, a=config.QT["default_alpha"]):
         """
         Set the fill color for drawing.
         """
         self.fill_color = QColor(r, g, b, a)
 
-    def draw_point(self, x, y, size=config.QT["point_size"]):
+    def add_item(self, item):
         """
-        Draw a point at the specified coordinates (x, y).
+        Add a QGraphicsItem to the scene, with fringing if it is on.
         """
-        point = QGraphicsEllipseItem(x - size / 2, y - size / 2, size, size)
-        point.setPen(QPen(self.stroke_color))
-        point.setBrush(QColor(self.fill_color))
         if self.color_fringing_on:
-            self.draw_with_fringing(point)
+            self.draw_with_fringing(item)
         else:
-            self.scene.addItem(point)
-        self.elements_array.append({'type': 'point', 'x': x, 'y': y, 'size': size})
+            self.scene.addItem(item)
+
+    def add_sprites(self, size, stroke_color, fill_color, positions, opacities=None):
+        """
+        Queue circles of the given size and colors at positions, with their glow
+        if fringing is on. Sprites are rendered at the current view scale, but
+        never below one pixel per canvas unit, Qt can't draw pixmaps with a
+        device pixel ratio below 1.
+
+        :param positions: List of (x, y) centers.
+        :param opacities: Optional list of opacities, one per position.
+        """
+        scale = max(round(self.view.transform().m11(), 2), 1.0)
+        self.sprite_batch.add(self.sprites.circle(size, stroke_color, fill_color, scale), positions, opacities)
+        if self.color_fringing_on:
+            glow = self.sprites.glow(size, self.fringing_color, config.QT["fringe_width"], scale)
+            self.glow_batch.add(glow, positions, opacities)
+
+    def line_item(self, start_x, start_y, end_x, end_y):
+        line = QGraphicsLineItem(start_x, start_y, end_x, end_y)
+        line.setPen(QPen(self.stroke_color, self.stroke_width))
+        return line
+
+    def path_item(self, path):
+        item = QGraphicsPathItem(path)
+        item.setPen(QPen(self.stroke_color, self.stroke_width))
+        return item
+
+    def polyline_path(self, points):
+        path = QPainterPath()
+        path.moveTo(points[0][0], points[0][1])
+        for x, y in points[1:]:
+            path.lineTo(x, y)
+        return path
+
+    def bezier_path(self, points):
+        path = QPainterPath()
+        path.moveTo(points[0][0], points[0][1])
+        path.cubicTo(points[1][0], points[1][1], points[2][0], points[2][1], points[3][0], points[3][1])
+        return path
+
+    def draw_point(self, x, y, size=config.QT["point_size"]):
+        """
+        Draw a point at the specified coordinates (x, y).
+        """
+        self.add_sprites(size, self.stroke_color, self.fill_color, [(x, y)])
+        self.frame.add_point((x, y))
 
     def draw_line(self, start_x, start_y, end_x, end_y):
         """
         Draw a line from (start_x, start_y) to (end_x, end_y).
         """
-        line = QGraphicsLineItem(start_x, start_y, end_x, end_y)
-        line.setPen(QPen(self.stroke_color))
-        if self.color_fringing_on:
-            self.draw_with_fringing(line)
-        else:
-            self.scene.addItem(line)
-        self.elements_array.append({'type': 'line', 'start_x': start_x, 'start_y': start_y, 'end_x': end_x, 'end_y': end_y})
+        self.add_item(self.line_item(start_x, start_y, end_x, end_y))
+        self.frame.add_line((start_x, start_y), (end_x, end_y))
 
     def draw_spline(self, points):
         """
@@ -182,25 +243,64 @@ class DisplayQT:
 
             path.lineTo(points[-1][0], points[-1][1])
 
-        spline = QGraphicsPathItem(path)
-        spline.setPen(QPen(self.stroke_color))
-        if self.color_fringing_on:
-            self.draw_with_fringing(spline)
-        else:
-            self.scene.addItem(spline)
-        self.elements_array.append({'type': 'spline', 'points': points})
+        self.add_item(self.path_item(path))
+        # Recorded as a polyline through its points, hotspots only need the endpoints
+        self.frame.add_polyline(points)
+
+    def draw_polyline(self, points):
+        """
+        Draw a polyline (straight segments) through the given points.
+        """
+        if len(points) < 2:
+            return  # Need at least two points to draw a polyline
+        self.add_item(self.path_item(self.polyline_path(points)))
+        self.frame.add_polyline(points)
+
+    def draw_cubic_bezier(self, points):
+        """
+        Draw a cubic bezier curve from its four control points.
+        """
+        self.add_item(self.path_item(self.bezier_path(points)))
+        self.frame.add_cubic_bezier(*points)
+
+    def draw_frame(self, frame):
+        """
+        Replace the scene with a finalized frame from a BasicRenderer or render node.
+        The frame's arrays are read directly and kept as the record for hotspots.
+        """
+        self.frame_reset()
+        stroke_color, stroke_width = self.stroke_color, self.stroke_width
+        colors = [QColor(*style.stroke_color) for style in frame.styles]
+        widths = [style.stroke_width for style in frame.styles]
+
+        for style in np.unique(frame.point_styles).tolist():
+            positions = frame.points[frame.point_styles == style].tolist()
+            self.add_sprites(config.QT["point_size"], colors[style], colors[style], positions)
+        for (start_x, start_y, end_x, end_y), style in zip(frame.lines.tolist(), frame.line_styles.tolist()):
+            self.stroke_color, self.stroke_width = colors[style], widths[style]
+            self.add_item(self.line_item(start_x, start_y, end_x, end_y))
+        for bezier, style in zip(frame.beziers.reshape(-1, 4, 2).tolist(), frame.bezier_styles.tolist()):
+            self.stroke_color, self.stroke_width = colors[style], widths[style]
+            self.add_item(self.path_item(self.bezier_path(bezier)))
+        for polyline, style in zip(frame.iter_polylines(), frame.polyline_styles.tolist()):
+            self.stroke_color, self.stroke_width = colors[style], widths[style]
+            self.add_item(self.path_item(self.polyline_path(polyline.tolist())))
+
+        self.stroke_color, self.stroke_width = stroke_color, stroke_width
+        self.frame = frame
+        if config.QT["hotspots_on"]:
+            self.draw_all_hotspots()
 
     def draw_square(self, x, y, size):
         """
         Draw an unfilled square at the specified coordinates (x, y) with the given size.
         """
         square = QGraphicsRectItem(x, y, size, size)
-        square.setPen(QPen(self.stroke_color))
-        if self.color_fringing_on:
-            self.draw_with_fringing(square)
-        else:
-            self.scene.addItem(square)
-        self.elements_array.append({'type': 'square', 'x': x, 'y': y, 'size': size})
+        square.setPen(QPen(self.stroke_color, self.stroke_width))
+        self.add_item(square)
+        # Frames have no squares, the corners are recorded as points for the hotspots
+        for corner in ((x, y), (x + size, y), (x, y + size), (x + size, y + size)):
+            self.frame.add_point(corner)
 
     # Additional drawing methods can be added here
 
@@ -237,90 +337,59 @@ class DisplayQT:
         # Add the original item on top of its glow
         self.scene.addItem(original_item)
 
-    def draw_hotspot(self, x, y):
+    def draw_hotspot(self, x, y, brightness=1.0):
         """
         Draw a hotspot at the specified coordinates (x, y).
+
+        :param brightness: Opacity of the hotspot, merged hotspots are brighter.
         """
-        size = config.QT["hotspot_size"]  # Diameter of the hotspot
-        hotspot = QGraphicsEllipseItem(x - size / 2, y - size / 2, size, size)
-        hotspot.setBrush(self.stroke_color)  # Set the color of the hotspot's fill
-        pen = QPen(self.stroke_color)  # Use the stroke_color for the border as well
-        pen.setWidth(1)  # Set the desired border width
-        hotspot.setPen(pen)  # Apply the pen to the hotspot
+        self.add_hotspots([(x, y)], [brightness])
 
-        if self.color_fringing_on:
-            self.draw_with_fringing(hotspot)
-        else:
-            self.scene.addItem(hotspot)
+    def add_hotspots(self, positions, brightness):
+        # Hotspots are filled and outlined with the stroke color
+        size = config.QT["hotspot_size"]
+        self.add_sprites(size, self.stroke_color, self.stroke_color, positions, brightness)
 
     def draw_all_hotspots(self):
         """
         Draw hotspots at endpoints and intersections of all elements.
+        Candidates closer than hotspot_merge_radius are merged into one hotspot.
+        self.frame is read as it is, a frame recorded with the draw_* methods
+        has to be finalized first.
         """
-        # Extract line segments and endpoints from elements_array
-        lines = []
-        for e in self.elements_array:
-            if e['type'] == 'line':
-                lines.append(((e['start_x'], e['start_y']), (e['end_x'], e['end_y'])))
-                # Add endpoints of the line
-                self.draw_hotspot(e['start_x'], e['start_y'])
-                self.draw_hotspot(e['end_x'], e['end_y'])
-            elif e['type'] == 'spline':
-                # Add endpoints of the spline
-                self.draw_hotspot(e['points'][0][0], e['points'][0][1])
-                self.draw_hotspot(e['points'][-1][0], e['points'][-1][1])
-            elif e['type'] == 'square':
-                # Add corners of the square
-                x, y, size = e['x'], e['y'], e['size']
-                self.draw_hotspot(x, y)
-                self.draw_hotspot(x + size, y)
-                self.draw_hotspot(x, y + size)
-                self.draw_hotspot(x + size, y + size)
-            elif e['type'] == 'point':
-                # Add the point itself
-                self.draw_hotspot(e['x'], e['y'])
-
-        # Calculate intersections
-        intersections = self.calculate_intersections(lines)
-
-        # Draw hotspots at intersections
-        for x, y in intersections:
-            self.draw_hotspot(x, y)
+        # Candidate hotspots are read straight from the frame arrays: points,
+        # endpoints of lines, beziers and polylines, and line intersections
+        frame = self.frame
+        polyline_starts, polyline_ends = frame.polyline_endpoints()
+        intersections = segment_intersections(frame.lines)
+        candidates = np.concatenate((
+            frame.points, frame.lines[:, 0:2], frame.lines[:, 2:4],
+            frame.beziers[:, 0:2], frame.beziers[:, 6:8],
+            polyline_starts, polyline_ends, intersections))
+
+        # Draw one hotspot per cluster, brighter the more candidates it merged
+        centroids, counts = cluster_points(candidates, config.QT["hotspot_merge_radius"])
+        if config.QT["hotspot_weighting_on"]:
+            brightness = hotspot_brightness(counts, config.QT["hotspot_base_opacity"])
+        else:
+            brightness = np.ones(len(counts))
+        self.add_hotspots(centroids.tolist(), brightness.tolist())
 
     def calculate_intersections(self, lines):
         """
         Find intersections among all pairs of lines.
         Each line is defined by two points: ((x1, y1), (x2, y2)).
         """
-        intersections = []
-        for i in range(len(lines)):
-            for j in range(i + 1, len(lines)):
-                intersection = self.calculate_line_intersection(lines[i], lines[j])
-                if intersection is not None:
-                    intersections.append(intersection)
-        return intersections
+        return segment_intersections(np.asarray(lines, dtype=float).reshape(-1, 4)).tolist()
 
     def calculate_line_intersection(self, line1, line2):
         """
-        Calculate the intersection point of two lines.
+        Calculate the intersection point of two lines, or None if they don't cross.
         Each line is defined by two points: ((x1, y1), (x2, y2)).
         """
-        p0, p1 = np.array(line1[0]), np.array(line1[1])
-        p2, p3 = np.array(line2[0]), np.array(line2[1])
+        intersections = self.calculate_intersections([line1, line2])
+        return intersections[0] if intersections else None
 
-        s10 = p1 - p0
-        s32 = p3 - p2
-        denom = np.cross(s10, s32)
-        if denom == 0:
-            return None  # Parallel lines
-
-        t = np.cross(p2 - p0, s32) / denom
-        if 0 <= t <= 1:
-            intersection = p0 + t * s10
-            return intersection.tolist()
-
-        return None
-    
     def run(self):
         """
         Start the PySide6 application event loop.
@@ -349,6 +418,7 @@ class DisplayQT:
     def update_lines(self):
         self.frame_reset()  # Clear the scene
 
+        new_lines = []
         for index, line in enumerate(self.test_lines):
             # Get the current position of the line endpoints
             start_x, start_y = line[0]
@@ -374,16 +444,15 @@ class DisplayQT:
             new_end_x = center_x + (end_x - center_x) * math.cos(self.rotation_angles[index]) - (end_y - center_y) * math.sin(self.rotation_angles[index])
             new_end_y = center_y + (end_x - center_x) * math.sin(self.rotation_angles[index]) + (end_y - center_y) * math.cos(self.rotation_angles[index])
 
-            # Ensure the points stay within the canvas bounds
-            new_start_x = max(0, min(self.canvas_width, new_start_x))
-            new_start_y = max(0, min(self.canvas_height, new_start_y))
-            new_end_x = max(0, min(self.canvas_width, new_end_x))
-            new_end_y = max(0, min(self.canvas_height, new_end_y))
+            new_lines.append((new_start_x, new_start_y, new_end_x, new_end_y))
 
-            # Draw the line with the updated endpoints
-            self.draw_line(new_start_x, new_start_y, new_end_x, new_end_y)
+        # Clip the lines to the canvas bounds and draw whatever is still visible
+        clipped_lines, _ = clip_lines(np.array(new_lines, dtype=float).reshape(-1, 4), (0, 0, self.canvas_width, self.canvas_height))
+        for start_x, start_y, end_x, end_y in clipped_lines.tolist():
+            self.draw_line(start_x, start_y, end_x, end_y)
 
         if config.QT["hotspots_on"]:
+            self.frame.finalize()
             self.draw_all_hotspots()  # Draw hotspots
 
 
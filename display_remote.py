@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+import config
+import render_protocol as protocol
+
+
+class RemoteDisplay:
+    """
+    RemoteDisplay is a stand-in for a display that runs in a render node on
+    another process or machine (see render_node.py). To the BasicRenderer it is
+    just another display; frames handed to it are encoded into compact binary
+    messages and streamed to the node. RemoteDisplay is responsible for:
+    - Running its own asyncio event loop in a background thread
+    - Connecting to the node over TCP or a Unix socket, and reconnecting when the link drops
+    - Streaming frames with sequence numbers, always sending the newest frame and
+      dropping stale ones when the link can't keep up
+    - Sending heartbeats and estimating the clock offset to the node from them
+    """
+
+    def __init__(self, host=None, port=None, path=None, name="renderer"):
+        """
+        Either host and port (TCP) or path (Unix socket) locate the node.
+        """
+        self.host = host or config.REMOTE["host"]
+        self.port = port or config.REMOTE["port"]
+        self.path = path
+        self.name = name
+        self.heartbeat_interval = config.REMOTE["heartbeat_interval"]
+        self.heartbeat_timeout = config.REMOTE["heartbeat_timeout"]
+        self.reconnect_delay = config.REMOTE["reconnect_delay"]
+        self.max_reconnect_delay = config.REMOTE["max_reconnect_delay"]
+
+        self.is_connected = False
+        self.frame_seq = 0  # Sequence number of the last frame handed over
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+        # Clock sync, offset is node clock minus local clock
+        self.clock_offset = 0.0
+        self.round_trip = None
+
+        self.loop = None
+        self.pending_frame = None
+        self.frame_ready = None
+
+    def start(self):
+        """
+        Start the event loop thread. Returns immediately, connecting happens in the background.
+        """
+        self.loop = asyncio.new_event_loop()
+        self.frame_ready = asyncio.Event()
+        threading.Thread(target=self.run_loop, daemon=True).start()
+        print(f"Remote display started for {self.describe_address()}")
+
+    def describe_address(self):
+        return self.path if self.path else f"{self.host}:{self.port}"
+
+    def run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.maintain_connection())
+
+    def draw_frame(self, frame):
+        """
+        Hand a finalized frame over to the event loop. Called from the render thread.
+        """
+        self.frame_seq += 1
+        payload = protocol.encode_frame(frame)
+        self.loop.call_soon_threadsafe(self.queue_frame, self.frame_seq, payload, time.time())
+
+    def queue_frame(self, seq, payload, timestamp):
+        # Only the newest frame is kept, the node sees the gap in frame sequence numbers
+        if self.pending_frame is not None:
+            self.frames_dropped += 1
+        self.pending_frame = (seq, payload, timestamp)
+        self.frame_ready.set()
+
+    async def maintain_connection(self):
+        """
+        Connect to the node and keep reconnecting with backoff whenever the link drops.
+        """
+        delay = self.reconnect_delay
+        while True:
+            try:
+                if self.path:
+                    reader, writer = await asyncio.open_unix_connection(self.path)
+                else:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as e:
+                print(f"Could not connect to render node at {self.describe_address()}: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            delay = self.reconnect_delay
+            self.is_connected = True
+            print(f"Connected to render node at {self.describe_address()}")
+            try:
+                await self.run_connection(reader, writer)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, protocol.ProtocolError) as e:
+                print(f"Render node connection lost: {e!r}")
+            finally:
+                self.is_connected = False
+                writer.close()
+
+    async def run_connection(self, reader, writer):
+        """
+        Run the sender, heartbeat and receiver until any of them fails.
+        """
+        writer.write(protocol.encode_message(protocol.HELLO, 0, self.name.encode('utf-8')))
+        tasks = [
+            asyncio.ensure_future(self.send_frames(writer)),
+            asyncio.ensure_future(self.send_heartbeats(writer)),
+            asyncio.ensure_future(self.receive(reader)),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()  # Re-raise whatever ended the connection
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def send_frames(self, writer):
+        while True:
+            await self.frame_ready.wait()
+            self.frame_ready.clear()
+            seq, payload, timestamp = self.pending_frame
+            self.pending_frame = None
+            # Stamp the frame in the node's clock so it can measure latency
+            writer.write(protocol.encode_message(protocol.FRAME, seq, payload, timestamp + self.clock_offset))
+            await writer.drain()
+            self.frames_sent += 1
+
+    async def send_heartbeats(self, writer):
+        ping_seq = 0
+        while True:
+            ping_seq += 1
+            writer.write(protocol.encode_message(protocol.PING, ping_seq))
+            await writer.drain()
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def receive(self, reader):
+        while True:
+            message_type, seq, timestamp, payload = await asyncio.wait_for(
+                protocol.read_message(reader), self.heartbeat_timeout)
+            if message_type == protocol.PONG:
+                t0, t1 = protocol.decode_pong(payload)
+                offset, round_trip = protocol.clock_sample(t0, t1, timestamp, time.time())
+                # Samples with the shortest round trip give the best offset estimate
+                if self.round_trip is None or round_trip <= self.round_trip * 1.5:
+                    self.clock_offset = offset
+                self.round_trip = round_trip if self.round_trip is None else 0.9 * self.round_trip + 0.1 * round_trip
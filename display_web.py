@@ -84,6 +84,12 @@ class DisplayWeb:
         self.socketio.emit('message', {'command': 'drawCubicBezier', 'params': {'points': points}})
         # print(f"Draw cubic Bezier curve from {p0} to {p3}")
 
+    def draw_polyline(self, points):
+        # Emit the draw_polyline command with the polyline vertices
+        points = [{'x': p[0], 'y': p[1]} for p in points]
+        self.socketio.emit('message', {'command': 'drawPolyline', 'params': {'points': points}})
+        # print(f"Draw polyline with {len(points)} points")
+
     #
     # TEST CODE
     #
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+import config
+import jinja2
+import render_protocol as protocol
+from aiohttp import web, WSMsgType
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class DisplayWebAsync:
+    """
+    DisplayWebAsync serves the same web page as DisplayWeb, but runs on a plain
+    asyncio event loop in its own thread instead of Flask, SocketIO and gevent.
+    Clients connect over a raw websocket. DisplayWebAsync is subservient to a
+    BasicRenderer class which views it as a black box. DisplayWebAsync is responsible for:
+    - Running an aiohttp server with its own event loop
+    - Serving up the webpage and static files, css, js, img, etc.
+    - Handling websocket client connections and disconnections
+    - Taking finished frames from the render thread and sending them to every client
+
+    The render thread only schedules the frame on the event loop with
+    call_soon_threadsafe, so handing a frame over costs the same no matter how
+    many primitives or clients there are. The frame is serialized once on the
+    event loop and put into a one slot queue per client; a slow client skips
+    stale frames instead of holding up the others. Frames are sent as binary
+    messages in the render node FRAME format (see render_protocol.py), which
+    the page decodes straight into typed arrays.
+    """
+
+    def __init__(self, host=None, port=None):
+        self.host = host or config.WEB["host"]
+        self.port = port or config.WEB["port"]
+        self.is_connected = False
+        self.loop = None
+        self.client_queues = set()
+
+        # The page is the same template DisplayWeb serves, rendered without Flask
+        self.templates = jinja2.Environment(loader=jinja2.FileSystemLoader(os.path.join(BASE_DIR, 'templates')))
+        self.templates.globals['url_for'] = lambda endpoint, filename: f'/{endpoint}/{filename}'
+
+        self.app = web.Application()
+        self.app.router.add_get('/', self.index)
+        self.app.router.add_get('/ws', self.handle_websocket)
+        self.app.router.add_static('/static', os.path.join(BASE_DIR, 'static'))
+
+    def start(self):
+        """
+        Run the server in a separate thread with its own event loop.
+        """
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.run_loop, daemon=True).start()
+        print(f"Web display started. Connect at http://{self.host}:{self.port}/")
+
+    def run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        runner = web.AppRunner(self.app)
+        self.loop.run_until_complete(runner.setup())
+        self.loop.run_until_complete(web.TCPSite(runner, self.host, self.port).start())
+        self.loop.run_forever()
+
+    async def index(self, request):
+        # route for serving the index.html file
+        page_config = dict(config.WEB, transport='websocket')
+        html = self.templates.get_template('index.html').render(config=page_config)
+        return web.Response(text=html, content_type='text/html')
+
+    async def handle_websocket(self, request):
+        """
+        Handle one client: send it frames from its queue until it disconnects.
+        """
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        frames = asyncio.Queue(maxsize=1)
+        self.client_queues.add(frames)
+        self.is_connected = True
+        print("Client connected")
+
+        sender = asyncio.ensure_future(self.send_frames(ws, frames))
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            sender.cancel()
+            self.client_queues.discard(frames)
+            self.is_connected = bool(self.client_queues)
+            print("Client disconnected")
+        return ws
+
+    async def send_frames(self, ws, frames):
+        while True:
+            message = await frames.get()
+            await ws.send_bytes(message)
+
+    def draw_frame(self, frame):
+        """
+        Hand a finalized frame over to the event loop. Called from the render thread.
+        """
+        self.loop.call_soon_threadsafe(self.broadcast, frame)
+
+    def broadcast(self, frame):
+        """
+        Serialize a frame once and queue it for every client, replacing any frame
+        the client hasn't picked up yet.
+        """
+        if not self.client_queues:
+            return
+        message = protocol.encode_frame(frame)
+        for frames in self.client_queues:
+            if frames.full():
+                frames.get_nowait()
+            frames.put_nowait(message)
+
+
+# Test condition
+if __name__ == "__main__":
+    display = DisplayWebAsync()
+    display.start()
+    threading.Event().wait()
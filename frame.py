@@ -0,0 +1,228 @@
+import numpy as np
+import config
+
+COORD = np.float32  # Canvas coordinates
+STYLE_INDEX = np.uint16  # Index into Frame.styles
+MIN_CAPACITY = 16
+
+# Coordinates per primitive for the fixed size kinds
+WIDTHS = {'points': 2, 'lines': 4, 'beziers': 8}
+
+
+class Style:
+    """
+    Stroke style shared by many primitives. Primitives only store the index of
+    their style in Frame.styles.
+    """
+    __slots__ = ('stroke_color', 'stroke_width')
+
+    def __init__(self, stroke_color, stroke_width):
+        self.stroke_color = tuple(stroke_color)  # (r, g, b, a)
+        self.stroke_width = stroke_width
+
+    def key(self):
+        return (self.stroke_color, self.stroke_width)
+
+
+def default_style():
+    return Style(config.QT["default_stroke_color"] + (config.QT["default_alpha"],), config.QT["default_stroke_width"])
+
+
+def grow(buffer, needed):
+    """
+    Return a copy of buffer with room for at least needed rows.
+    """
+    new_buffer = np.empty((max(needed, 2 * len(buffer)),) + buffer.shape[1:], dtype=buffer.dtype)
+    new_buffer[:len(buffer)] = buffer
+    return new_buffer
+
+
+class Frame:
+    """
+    Frame is the struct-of-arrays buffer for everything drawn between
+    frame_start and frame_end. It is shared by every stage after the renderer
+    (clipping, level of detail, tiling) and read directly by the displays,
+    the hotspot pass and the serializers, so a primitive is never a Python
+    object of its own.
+
+    Primitives are written straight into typed, growable buffers. Calling
+    finalize() exposes the filled part of each buffer as a view:
+    - points: (N, 2) array of [x, y]
+    - lines: (N, 4) array of [x0, y0, x1, y1]
+    - beziers: (N, 8) array of [x0, y0, x1, y1, x2, y2, x3, y3]
+    - polyline_vertices: (M, 2) array holding the vertices of every polyline
+    - polyline_offsets: (K + 1,) array, polyline k is vertices[offsets[k]:offsets[k + 1]]
+    - polyline_importance: (K,) array of per-polyline weights used by level-of-detail
+    - point_styles, line_styles, bezier_styles, polyline_styles: style index of
+      each primitive into styles, a list of Style records
+    """
+
+    ARRAYS = ('points', 'point_styles', 'lines', 'line_styles', 'beziers', 'bezier_styles',
+              'polyline_vertices', 'polyline_offsets', 'polyline_importance', 'polyline_styles')
+
+    def __init__(self, sizes=None):
+        """
+        Initialize an empty frame.
+
+        :param sizes: Optional dict from sizes() of a previous frame, used to
+            allocate buffers that fit without growing.
+        """
+        sizes = sizes or {}
+        self.styles = [default_style()]
+        self.style_lookup = {self.styles[0].key(): 0}
+        self.current_style = 0
+
+        self.buffers = {}
+        self.style_buffers = {}
+        self.counts = {}
+        for kind, width in WIDTHS.items():
+            capacity = max(sizes.get(kind, 0), MIN_CAPACITY)
+            self.buffers[kind] = np.empty((capacity, width), dtype=COORD)
+            self.style_buffers[kind] = np.empty(capacity, dtype=STYLE_INDEX)
+            self.counts[kind] = 0
+
+        capacity = max(sizes.get('polylines', 0), MIN_CAPACITY)
+        self.vertex_buffer = np.empty((max(sizes.get('vertices', 0), MIN_CAPACITY), 2), dtype=COORD)
+        self.offset_buffer = np.zeros(capacity + 1, dtype=np.int64)
+        self.importance_buffer = np.empty(capacity, dtype=COORD)
+        self.style_buffers['polylines'] = np.empty(capacity, dtype=STYLE_INDEX)
+        self.counts['polylines'] = 0
+        self.vertex_count = 0
+
+        self.finalize()
+
+    def set_style(self, stroke_color, stroke_width):
+        """
+        Set the style of the primitives added from now on.
+
+        :param stroke_color: (r, g, b, a) tuple.
+        """
+        style = Style(stroke_color, stroke_width)
+        if style.key() not in self.style_lookup:
+            self.style_lookup[style.key()] = len(self.styles)
+            self.styles.append(style)
+        self.current_style = self.style_lookup[style.key()]
+
+    def append(self, kind, values):
+        n = self.counts[kind]
+        if n == len(self.buffers[kind]):
+            self.buffers[kind] = grow(self.buffers[kind], n + 1)
+            self.style_buffers[kind] = grow(self.style_buffers[kind], n + 1)
+        self.buffers[kind][n] = values
+        self.style_buffers[kind][n] = self.current_style
+        self.counts[kind] = n + 1
+
+    def add_point(self, p0):
+        self.append('points', (p0[0], p0[1]))
+
+    def add_line(self, p0, p1):
+        self.append('lines', (p0[0], p0[1], p1[0], p1[1]))
+
+    def add_cubic_bezier(self, p0, p1, p2, p3):
+        self.append('beziers', (p0[0], p0[1], p1[0], p1[1], p2[0], p2[1], p3[0], p3[1]))
+
+    def add_polyline(self, points, importance=1.0):
+        if len(points) < 2:
+            return  # Need at least two points to draw a polyline
+        n, start = self.counts['polylines'], self.vertex_count
+        end = start + len(points)
+        if end > len(self.vertex_buffer):
+            self.vertex_buffer = grow(self.vertex_buffer, end)
+        if n == len(self.importance_buffer):
+            self.offset_buffer = grow(self.offset_buffer, n + 2)
+            self.importance_buffer = grow(self.importance_buffer, n + 1)
+            self.style_buffers['polylines'] = grow(self.style_buffers['polylines'], n + 1)
+        self.vertex_buffer[start:end] = points
+        self.offset_buffer[n + 1] = end
+        self.importance_buffer[n] = importance
+        self.style_buffers['polylines'][n] = self.current_style
+        self.counts['polylines'] = n + 1
+        self.vertex_count = end
+
+    def finalize(self):
+        """
+        Expose the filled part of every buffer as array views. Cheap, nothing is copied.
+        """
+        for kind in WIDTHS:
+            n = self.counts[kind]
+            setattr(self, kind, self.buffers[kind][:n])
+            setattr(self, kind[:-1] + '_styles', self.style_buffers[kind][:n])
+        n = self.counts['polylines']
+        self.polyline_vertices = self.vertex_buffer[:self.vertex_count]
+        self.polyline_offsets = self.offset_buffer[:n + 1]
+        self.polyline_importance = self.importance_buffer[:n]
+        self.polyline_styles = self.style_buffers['polylines'][:n]
+        return self
+
+    def sizes(self):
+        """
+        Return the number of primitives of each kind, to size the next frame's buffers.
+        """
+        return dict(self.counts, vertices=self.vertex_count)
+
+    @classmethod
+    def from_arrays(cls, styles=None, **arrays):
+        """
+        Build a finalized frame from arrays named as in Frame.ARRAYS. Missing
+        geometry is empty, missing style indices point at the first style and
+        missing importance is 1.
+        """
+        frame = cls.__new__(cls)
+        frame.styles = styles or [default_style()]
+        for kind, width in WIDTHS.items():
+            arrays.setdefault(kind, np.empty((0, width), dtype=COORD))
+        arrays.setdefault('polyline_vertices', np.empty((0, 2), dtype=COORD))
+        arrays.setdefault('polyline_offsets', np.zeros(1, dtype=np.int64))
+        n_polylines = len(arrays['polyline_offsets']) - 1
+        arrays.setdefault('polyline_importance', np.ones(n_polylines, dtype=COORD))
+        for kind in WIDTHS:
+            arrays.setdefault(kind[:-1] + '_styles', np.zeros(len(arrays[kind]), dtype=STYLE_INDEX))
+        arrays.setdefault('polyline_styles', np.zeros(n_polylines, dtype=STYLE_INDEX))
+        for name in cls.ARRAYS:
+            setattr(frame, name, arrays[name])
+        return frame
+
+    def replace(self, **arrays):
+        """
+        Return a finalized frame with the same styles and arrays, except the given ones.
+        """
+        for name in self.ARRAYS:
+            arrays.setdefault(name, getattr(self, name))
+        return Frame.from_arrays(self.styles, **arrays)
+
+    def select(self, points=None, lines=None, beziers=None, polylines=None):
+        """
+        Return a finalized frame keeping only the primitives picked by the given
+        boolean masks. Kinds without a mask are kept whole.
+        """
+        arrays = {}
+        for kind, mask in (('points', points), ('lines', lines), ('beziers', beziers)):
+            if mask is not None:
+                arrays[kind] = getattr(self, kind)[mask]
+                arrays[kind[:-1] + '_styles'] = getattr(self, kind[:-1] + '_styles')[mask]
+        if polylines is not None:
+            lengths = np.diff(self.polyline_offsets)
+            arrays['polyline_vertices'] = self.polyline_vertices[np.repeat(polylines, lengths)]
+            arrays['polyline_offsets'] = np.concatenate(([0], np.cumsum(lengths[polylines])))
+            arrays['polyline_importance'] = self.polyline_importance[polylines]
+            arrays['polyline_styles'] = self.polyline_styles[polylines]
+        return self.replace(**arrays)
+
+    def iter_polylines(self):
+        """
+        Yield each polyline as an (N, 2) view into polyline_vertices.
+        """
+        offsets = self.polyline_offsets
+        for k in range(len(offsets) - 1):
+            yield self.polyline_vertices[offsets[k]:offsets[k + 1]]
+
+    def polyline_endpoints(self):
+        """
+        Return the (K, 2) first and last vertices of every polyline.
+        """
+        offsets = self.polyline_offsets
+        return self.polyline_vertices[offsets[:-1]], self.polyline_vertices[offsets[1:] - 1]
+
+    def primitive_count(self):
+        """Return the number of primitives in a finalized frame."""
+        return len(self.points) + len(self.lines) + len(self.beziers) + len(self.polyline_offsets) - 1
@@ -0,0 +1,172 @@
+"""
+Hotspot clustering.
+
+Endpoints shared by several primitives and intersections that land almost on
+top of each other would otherwise each get their own hotspot. Points closer
+than the merge radius are linked, and every group of linked points becomes one
+hotspot (single linkage, so a chain of close points merges even if its ends
+are further apart). Candidate pairs come from a spatial hash: points are
+hashed into a grid of cells one merge radius wide, so only points in the same
+or neighbouring cells can be linked. Everything is done with array
+operations, the only loop is the label propagation that joins linked points,
+which converges in a few passes.
+
+Line intersections, the other source of candidates, are found with a sweep
+along x: lines are sorted by their left end, so each line only has to be
+tested against the lines that start before it ends. The candidate pairs are
+tested in chunks with array operations.
+"""
+
+import numpy as np
+
+# Forward neighbours, together with the cell itself they cover all 8 neighbours once
+NEIGHBOUR_OFFSETS = np.array([[1, 0], [0, 1], [1, 1], [1, -1]])
+
+# Candidate line pairs tested per pass, bounds the memory of segment_intersections
+INTERSECTION_CHUNK = 1 << 18
+
+
+def cell_keys(cells):
+    """
+    Pack (N, 2) integer cell coordinates into one sortable int64 key per cell.
+    """
+    return (cells[:, 0].astype(np.int64) << 32) + (cells[:, 1].astype(np.int64) & 0xFFFFFFFF)
+
+
+def run_pairs(starts_a, counts_a, starts_b, counts_b):
+    """
+    Return every (i, j) index pair between the runs starts_a[n]:starts_a[n] + counts_a[n]
+    and starts_b[n]:starts_b[n] + counts_b[n].
+    """
+    n_pairs = counts_a * counts_b
+    run_of_pair = np.repeat(np.arange(len(n_pairs)), n_pairs)
+    within = np.arange(n_pairs.sum()) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+    i = starts_a[run_of_pair] + within // counts_b[run_of_pair]
+    j = starts_b[run_of_pair] + within % counts_b[run_of_pair]
+    return i, j
+
+
+def cluster_points(points, radius):
+    """
+    Merge points that are within radius of each other, directly or through a
+    chain of points each within radius of the next.
+
+    :param points: (N, 2) array of candidate points.
+    :param radius: Merge radius in canvas units. With a radius of 0 only exact
+        duplicates are merged.
+    :return: (centroids, counts), an (M, 2) array with the centroid of each
+        cluster and an (M,) array with the number of points merged into it.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    # Exact duplicates (shared endpoints) are merged first, so a crowded cell
+    # doesn't produce a pair for every copy
+    unique_points, point_of_candidate, multiplicity = np.unique(
+        points, axis=0, return_inverse=True, return_counts=True)
+    if len(points) == 0 or radius <= 0:
+        return unique_points, multiplicity
+    point_of_candidate = point_of_candidate.reshape(-1)
+
+    # Spatial hash, points sorted by cell so each cell is a run of points
+    cells = np.floor(unique_points / radius).astype(np.int64)
+    cells -= cells.min(axis=0)  # Non-negative cells keep the packed keys in sorted order
+    order = np.argsort(cell_keys(cells), kind='stable')
+    unique_points, multiplicity, cells = unique_points[order], multiplicity[order], cells[order]
+    point_of_candidate = np.argsort(order)[point_of_candidate]
+    keys, cell_starts, cell_counts = np.unique(cell_keys(cells), return_index=True, return_counts=True)
+    cell_coords = cells[cell_starts]
+
+    # Candidate pairs: points in the same cell, and points in neighbouring cells
+    i, j = run_pairs(cell_starts, cell_counts, cell_starts, cell_counts)
+    same_cell = i < j
+    pairs = [(i[same_cell], j[same_cell])]
+    for offset in NEIGHBOUR_OFFSETS:
+        neighbour_keys = cell_keys(cell_coords + offset)
+        positions = np.clip(np.searchsorted(keys, neighbour_keys), 0, len(keys) - 1)
+        found = np.flatnonzero(keys[positions] == neighbour_keys)
+        b = positions[found]
+        pairs.append(run_pairs(cell_starts[found], cell_counts[found], cell_starts[b], cell_counts[b]))
+    a = np.concatenate([pair[0] for pair in pairs])
+    b = np.concatenate([pair[1] for pair in pairs])
+    close = np.hypot(*(unique_points[a] - unique_points[b]).T) <= radius
+    a, b = a[close], b[close]
+
+    # Join linked points by propagating the smallest label until nothing changes
+    labels = np.arange(len(unique_points))
+    while len(a):
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, a, labels[b])
+        np.minimum.at(new_labels, b, labels[a])
+        new_labels = new_labels[new_labels]
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+    _, cluster_of_point = np.unique(labels[point_of_candidate], return_inverse=True)
+    cluster_of_point = cluster_of_point.reshape(-1)
+    counts = np.bincount(cluster_of_point)
+    centroids = np.column_stack([np.bincount(cluster_of_point, weights=points[:, axis]) for axis in (0, 1)])
+    return centroids / counts[:, None], counts
+
+
+def cross(a, b):
+    """
+    2D cross product of two (N, 2) arrays.
+    """
+    return a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+
+
+def segment_intersections(lines):
+    """
+    Find the points where segments cross each other.
+
+    :param lines: (N, 4) array of [x0, y0, x1, y1].
+    :return: (M, 2) array with one point per crossing pair. Parallel and
+        collinear pairs have no single crossing point and are skipped.
+    """
+    lines = np.asarray(lines, dtype=float).reshape(-1, 4)
+    xmin, xmax = np.minimum(lines[:, 0], lines[:, 2]), np.maximum(lines[:, 0], lines[:, 2])
+    order = np.argsort(xmin, kind='stable')
+    lines, xmin, xmax = lines[order], xmin[order], xmax[order]
+    ymin, ymax = np.minimum(lines[:, 1], lines[:, 3]), np.maximum(lines[:, 1], lines[:, 3])
+
+    # Sweep along x, line i is only paired with the later lines that start before it ends
+    n = len(lines)
+    counts = np.maximum(np.searchsorted(xmin, xmax, side='right') - np.arange(n) - 1, 0)
+    pair_ends = np.cumsum(counts)
+
+    intersections = []
+    row = 0
+    while row < n:
+        # Take whole rows until the chunk is full, at least one row per pass
+        done = pair_ends[row - 1] if row else 0
+        stop = max(int(np.searchsorted(pair_ends, done + INTERSECTION_CHUNK, side='right')), row + 1)
+        rows = np.arange(row, stop)
+        row_counts = counts[rows]
+        i = np.repeat(rows, row_counts)
+        j = i + 1 + np.arange(row_counts.sum()) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        row = stop
+
+        # Bounding boxes have to overlap in y as well
+        overlap = (ymin[j] <= ymax[i]) & (ymin[i] <= ymax[j])
+        i, j = i[overlap], j[overlap]
+
+        # Solve p + t * r = q + u * s, both parameters have to be on their segment
+        p, r = lines[i, :2], lines[i, 2:] - lines[i, :2]
+        q, s = lines[j, :2], lines[j, 2:] - lines[j, :2]
+        denom = cross(r, s)
+        safe_denom = np.where(denom == 0, 1.0, denom)
+        t = cross(q - p, s) / safe_denom
+        u = cross(q - p, r) / safe_denom
+        crossing = (denom != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+        intersections.append(p[crossing] + t[crossing, None] * r[crossing])
+
+    if not intersections:
+        return np.empty((0, 2))
+    return np.concatenate(intersections)
+
+
+def hotspot_brightness(counts, base_opacity):
+    """
+    Opacity of merged hotspots, as bright as that many stacked hotspots of base_opacity.
+    """
+    return 1 - (1 - base_opacity) ** np.asarray(counts)
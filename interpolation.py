@@ -0,0 +1,125 @@
+"""
+Keyframe interpolation for generated scenes.
+
+A scene is a dict mapping a primitive id to (kind, coords), where kind is one
+of 'point', 'line', 'bezier' or 'polyline' and coords is a sequence of (x, y)
+vertices. Keyframes group primitives by kind and vertex count so that the
+in-between frames can be computed with one array operation per group.
+
+Primitives are matched across keyframes by id. A primitive that only exists
+in the earlier keyframe collapses into its centroid, one that only exists in
+the later keyframe grows out of its centroid. Points have nothing to collapse,
+so they fade out and in instead. An id that changes kind or vertex count does
+both.
+"""
+
+import numpy as np
+
+INTERPOLATIONS = ('linear', 'eased', 'spline')
+
+
+class Keyframe:
+    """
+    A scene evaluated at one point in time, stored as arrays per (kind, vertex count).
+    """
+
+    def __init__(self, time, scene):
+        self.time = time
+        grouped = {}
+        for primitive_id, (kind, coords) in scene.items():
+            coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+            grouped.setdefault((kind, len(coords)), ([], []))
+            grouped[(kind, len(coords))][0].append(primitive_id)
+            grouped[(kind, len(coords))][1].append(coords)
+        # Each group holds (ids, coords) with coords of shape (N, vertices, 2)
+        self.groups = {key: (np.asarray(ids), np.stack(coords)) for key, (ids, coords) in grouped.items()}
+
+
+def match_ids(ids, other_ids):
+    """
+    Return for each of ids its row in other_ids, or -1 where it is missing.
+    """
+    if len(other_ids) == 0:
+        return np.full(len(ids), -1)
+    order = np.argsort(other_ids)
+    positions = np.clip(np.searchsorted(other_ids[order], ids), 0, len(other_ids) - 1)
+    rows = order[positions]
+    return np.where(other_ids[rows] == ids, rows, -1)
+
+
+def ease(u, interpolation):
+    if interpolation == 'linear':
+        return u
+    return u * u * (3 - 2 * u)  # Smoothstep
+
+
+def catmull_rom(p0, p1, p2, p3, u):
+    """
+    Evaluate uniform Catmull-Rom splines through p1 and p2 at parameter u.
+    """
+    return 0.5 * (2 * p1 + (p2 - p0) * u + (2 * p0 - 5 * p1 + 4 * p2 - p3) * u ** 2
+                  + (3 * p1 - p0 - 3 * p2 + p3) * u ** 3)
+
+
+def scale_about_centroid(coords, factor):
+    centroids = coords.mean(axis=1, keepdims=True)
+    return centroids + (coords - centroids) * factor
+
+
+def interpolate(k0, k1, u, interpolation='eased', k_prev=None, k_next=None):
+    """
+    Interpolate between two keyframes.
+
+    :param k0: Keyframe at or before the requested time.
+    :param k1: Keyframe after the requested time.
+    :param u: Position between them, from 0 (k0) to 1 (k1).
+    :param interpolation: 'linear', 'eased' or 'spline'. Spline uses
+        Catmull-Rom through k_prev, k0, k1 and k_next where they have the
+        primitive, and holds the nearest keyframe where they don't.
+    :return: List of (kind, coords, opacity) groups with coords of shape
+        (N, vertices, 2). opacity is 1 except for points fading out or in.
+    """
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Unknown interpolation: {interpolation}")
+    e = ease(u, interpolation)
+    groups = []
+
+    for key, (ids0, coords0) in k0.groups.items():
+        ids1, coords1 = k1.groups.get(key, (np.empty(0), np.empty((0,) + coords0.shape[1:])))
+        rows1 = match_ids(ids0, ids1)
+        matched = rows1 >= 0
+        p1, p2 = coords0[matched], coords1[rows1[matched]]
+
+        if interpolation == 'spline':
+            p0, p3 = p1.copy(), p2.copy()
+            for neighbour, target, ids in ((k_prev, p0, ids0[matched]), (k_next, p3, ids1[rows1[matched]])):
+                if neighbour is not None and key in neighbour.groups:
+                    neighbour_ids, neighbour_coords = neighbour.groups[key]
+                    rows = match_ids(ids, neighbour_ids)
+                    target[rows >= 0] = neighbour_coords[rows[rows >= 0]]
+            moved = catmull_rom(p0, p1, p2, p3, u)
+        else:
+            moved = p1 + (p2 - p1) * e
+
+        groups.append((key[0], moved, 1.0))
+
+        # Primitives leaving the scene collapse into their centroid (points fade out),
+        # and are gone once fully collapsed
+        if e < 1 and not np.all(matched):
+            leaving = coords0[~matched]
+            if key[0] == 'point':
+                groups.append((key[0], leaving, 1 - e))
+            else:
+                groups.append((key[0], scale_about_centroid(leaving, 1 - e), 1.0))
+
+    # Primitives entering the scene grow out of their centroid (points fade in)
+    for key, (ids1, coords1) in k1.groups.items():
+        ids0 = k0.groups[key][0] if key in k0.groups else np.empty(0)
+        entering = match_ids(ids1, ids0) < 0
+        if e > 0 and np.any(entering):
+            if key[0] == 'point':
+                groups.append((key[0], coords1[entering], e))
+            else:
+                groups.append((key[0], scale_about_centroid(coords1[entering], e), 1.0))
+
+    return groups
@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import os
+import queue
+import sys
+import threading
+import time
+import config
+import render_protocol as protocol
+from display_headless import DisplayHeadless
+
+
+class RenderNode:
+    """
+    RenderNode hosts a display in its own process, possibly on another machine,
+    and feeds it frames streamed by a RemoteDisplay. RenderNode is responsible for:
+    - Listening on a TCP port or a Unix socket with an asyncio event loop
+    - Decoding binary frames and tracking sequence numbers to count dropped frames
+    - Answering heartbeats so the sender can detect dead links and sync clocks
+    - Dropping connections that go silent
+    - Handing frames to the display, either directly or through a queue for
+      displays that have to be driven from another thread (like DisplayQT)
+    """
+
+    def __init__(self, display, host=None, port=None, path=None, threaded_display=False):
+        """
+        :param display: The display to feed, it needs a draw_frame method.
+        :param threaded_display: If True frames are queued for present_pending()
+            instead of being drawn on the event loop thread.
+        """
+        self.display = display
+        self.host = host or config.REMOTE["host"]
+        self.port = port or config.REMOTE["port"]
+        self.path = path
+        self.heartbeat_timeout = config.REMOTE["heartbeat_timeout"]
+        self.threaded_display = threaded_display
+        self.frames = queue.Queue(maxsize=1)
+
+        self.last_seq = None
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.latency = 0.0
+
+    async def serve(self):
+        """
+        Serve connections until cancelled.
+        """
+        if self.path:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            server = await asyncio.start_unix_server(self.handle_connection, self.path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        print(f"Render node listening on {self.path or f'{self.host}:{self.port}'}")
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        """
+        Run the node on the current thread.
+        """
+        asyncio.run(self.serve())
+
+    def start(self):
+        """
+        Run the node on a background thread.
+        """
+        threading.Thread(target=self.run, daemon=True).start()
+
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info('peername') or self.path
+        print(f"Renderer connected from {peer}")
+        self.last_seq = None
+        try:
+            while True:
+                message_type, seq, timestamp, payload = await asyncio.wait_for(
+                    protocol.read_message(reader), self.heartbeat_timeout)
+                received_at = time.time()
+                if message_type == protocol.PING:
+                    writer.write(protocol.encode_message(protocol.PONG, seq, protocol.encode_pong(timestamp, received_at)))
+                    await writer.drain()
+                elif message_type == protocol.FRAME:
+                    self.check_sequence(seq)
+                    self.latency = received_at - timestamp
+                    self.present(protocol.decode_frame(payload))
+                elif message_type == protocol.HELLO:
+                    print(f"Renderer identifies as {payload.decode('utf-8')}")
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, protocol.ProtocolError) as e:
+            print(f"Renderer connection lost: {e!r}")
+        finally:
+            writer.close()
+
+    def check_sequence(self, seq):
+        # A gap in frame numbers means the sender skipped stale frames
+        if self.last_seq is not None and seq > self.last_seq + 1:
+            self.frames_dropped += seq - self.last_seq - 1
+        self.last_seq = seq
+
+    def present(self, frame):
+        self.frames_received += 1
+        if not self.threaded_display:
+            self.display.draw_frame(frame)
+            return
+        # Only the newest frame is kept for the display thread
+        try:
+            self.frames.get_nowait()
+        except queue.Empty:
+            pass
+        self.frames.put_nowait(frame)
+
+    def present_pending(self):
+        """
+        Draw the newest queued frame, if any. Call this from the display's thread.
+        """
+        try:
+            frame = self.frames.get_nowait()
+        except queue.Empty:
+            return
+        self.display.draw_frame(frame)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a Fragile render node.")
+    parser.add_argument('--display', choices=['headless', 'qt'], default='headless')
+    parser.add_argument('--host', default=config.REMOTE["host"])
+    parser.add_argument('--port', type=int, default=config.REMOTE["port"])
+    parser.add_argument('--unix', help="Listen on a Unix socket at this path instead of TCP")
+    args = parser.parse_args()
+
+    if args.display == 'qt':
+        from PySide6.QtWidgets import QApplication
+        from PySide6.QtCore import QTimer
+        from display_qt import DisplayQT
+
+        app = QApplication(sys.argv)
+        display = DisplayQT(*config.QT["canvas_size"])
+        node = RenderNode(display, args.host, args.port, args.unix, threaded_display=True)
+        node.start()
+
+        # Qt has to be driven from the main thread, so poll for frames there
+        timer = QTimer()
+        timer.timeout.connect(node.present_pending)
+        timer.start(5)
+        display.run()
+    else:
+        display = DisplayHeadless()
+        display.start()
+        node = RenderNode(display, args.host, args.port, args.unix)
+        node.run()
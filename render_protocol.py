@@ -0,0 +1,135 @@
+"""
+Binary protocol spoken between a RemoteDisplay and a render node.
+
+Every message is a fixed header followed by a payload:
+- header: magic, version, message type, sequence number, sender timestamp
+  (seconds, time.time() of the sender) and payload length, in network order.
+  Frames and pings are numbered independently, a gap in frame numbers means
+  the sender skipped stale frames.
+- FRAME payload: primitive and style counts, the style table as float32
+  rows of (r, g, b, a, stroke width), little-endian float32 arrays for points,
+  lines, beziers and polyline vertices, uint32 polyline offsets and finally
+  uint16 style indices for points, lines, beziers and polylines. The arrays
+  are the Frame buffers as they are, so encoding is a few memory copies.
+- PING payload: empty, the header timestamp is the send time t0.
+- PONG payload: t0 echoed back and t1, when the node received the ping. The
+  header timestamp is t2, when the pong was sent. Together with the receive
+  time t3 this gives an NTP style clock offset and round trip estimate.
+- HELLO payload: UTF-8 name of the sender.
+"""
+
+import struct
+import time
+import numpy as np
+from frame import Frame, Style, WIDTHS
+
+MAGIC = b'FRGL'
+VERSION = 2
+
+HELLO = 1
+FRAME = 2
+PING = 3
+PONG = 4
+
+HEADER = struct.Struct('!4sBBIdI')
+FRAME_COUNTS = struct.Struct('!IIIIII')
+PONG_TIMES = struct.Struct('!dd')
+
+FLOAT = np.dtype('<f4')
+OFFSET = np.dtype('<u4')
+STYLE_INDEX = np.dtype('<u2')
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_message(message_type, seq, payload=b'', timestamp=None):
+    """
+    Prefix a payload with a message header.
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    return HEADER.pack(MAGIC, VERSION, message_type, seq & 0xFFFFFFFF, timestamp, len(payload)) + payload
+
+
+async def read_message(reader):
+    """
+    Read one message from an asyncio StreamReader.
+
+    :return: (message_type, seq, timestamp, payload)
+    """
+    header = await reader.readexactly(HEADER.size)
+    magic, version, message_type, seq, timestamp, length = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ProtocolError(f"Unexpected header: {magic!r} version {version}")
+    payload = await reader.readexactly(length)
+    return message_type, seq, timestamp, payload
+
+
+def encode_frame(frame):
+    """
+    Encode a finalized frame as a FRAME payload.
+    """
+    n_polylines = len(frame.polyline_offsets) - 1
+    counts = FRAME_COUNTS.pack(len(frame.points), len(frame.lines), len(frame.beziers),
+                               n_polylines, len(frame.polyline_vertices), len(frame.styles))
+    styles = [style.stroke_color + (style.stroke_width,) for style in frame.styles]
+    return b''.join((
+        counts,
+        np.asarray(styles, dtype=FLOAT).tobytes(),
+        np.ascontiguousarray(frame.points, dtype=FLOAT).tobytes(),
+        np.ascontiguousarray(frame.lines, dtype=FLOAT).tobytes(),
+        np.ascontiguousarray(frame.beziers, dtype=FLOAT).tobytes(),
+        np.ascontiguousarray(frame.polyline_vertices, dtype=FLOAT).tobytes(),
+        np.ascontiguousarray(frame.polyline_offsets, dtype=OFFSET).tobytes(),
+        np.ascontiguousarray(frame.point_styles, dtype=STYLE_INDEX).tobytes(),
+        np.ascontiguousarray(frame.line_styles, dtype=STYLE_INDEX).tobytes(),
+        np.ascontiguousarray(frame.bezier_styles, dtype=STYLE_INDEX).tobytes(),
+        np.ascontiguousarray(frame.polyline_styles, dtype=STYLE_INDEX).tobytes(),
+    ))
+
+
+def decode_frame(payload):
+    """
+    Decode a FRAME payload into a finalized frame. The arrays are views on the payload.
+    """
+    n_points, n_lines, n_beziers, n_polylines, n_vertices, n_styles = FRAME_COUNTS.unpack_from(payload)
+    position = FRAME_COUNTS.size
+    arrays = []
+    for count, width, dtype in ((n_styles, 5, FLOAT),
+                                (n_points, WIDTHS['points'], FLOAT), (n_lines, WIDTHS['lines'], FLOAT),
+                                (n_beziers, WIDTHS['beziers'], FLOAT), (n_vertices, 2, FLOAT),
+                                (n_polylines + 1, 1, OFFSET),
+                                (n_points, 1, STYLE_INDEX), (n_lines, 1, STYLE_INDEX),
+                                (n_beziers, 1, STYLE_INDEX), (n_polylines, 1, STYLE_INDEX)):
+        array = np.frombuffer(payload, dtype=dtype, count=count * width, offset=position)
+        position += array.nbytes
+        arrays.append(array.reshape(-1, width) if width > 1 else array)
+    if position != len(payload):
+        raise ProtocolError("Frame payload size does not match its counts")
+    styles, points, lines, beziers, vertices, offsets, point_styles, line_styles, bezier_styles, polyline_styles = arrays
+    styles = [Style(tuple(int(c) for c in row[:4]), float(row[4])) for row in styles]
+    return Frame.from_arrays(
+        styles, points=points, lines=lines, beziers=beziers,
+        polyline_vertices=vertices, polyline_offsets=offsets.astype(np.int64),
+        point_styles=point_styles, line_styles=line_styles,
+        bezier_styles=bezier_styles, polyline_styles=polyline_styles)
+
+
+def encode_pong(t0, t1):
+    return PONG_TIMES.pack(t0, t1)
+
+
+def decode_pong(payload):
+    return PONG_TIMES.unpack(payload)
+
+
+def clock_sample(t0, t1, t2, t3):
+    """
+    Compute (offset, round_trip) from a ping/pong exchange, offset being
+    remote clock minus local clock.
+    """
+    offset = ((t1 - t0) + (t2 - t3)) / 2
+    round_trip = (t3 - t0) - (t2 - t1)
+    return offset, round_trip
@@ -0,0 +1,186 @@
+"""
+Level-of-detail simplification for polylines.
+
+Vertices are ranked with Ramer–Douglas–Peucker: each interior vertex gets the
+distance at which RDP would keep it, clamped so that it never exceeds the
+distance of the vertex that split its parent span. Keeping every vertex whose
+rank is above a threshold then gives exactly the RDP result for that threshold,
+so one ranking pass serves both modes:
+- tolerance: keep vertices that deviate more than the tolerance (in canvas units).
+- vertex_budget: keep the most important vertices across the whole frame, so
+  the budget goes to the polylines where dropping vertices would be most visible.
+
+All polylines of a frame are ranked together, one array pass per RDP level.
+Endpoints are always kept. The error reported is the largest rank among the
+dropped vertices, which bounds how far the simplified geometry strays from the
+original.
+"""
+
+import numpy as np
+
+
+def segment_distances(points, start, end):
+    """
+    Return the distance from each of the (N, 2) points to its segment start-end.
+    start and end are either one (2,) point or (N, 2) arrays, one segment per point.
+    """
+    delta = end - start
+    length_sq = np.sum(delta * delta, axis=-1)
+    t = np.sum((points - start) * delta, axis=-1) / np.where(length_sq == 0, 1.0, length_sq)
+    t = np.clip(t, 0.0, 1.0)
+    return np.hypot(*(points - (start + t[..., None] * delta)).T)
+
+
+def rank_polylines(vertices, offsets, stop_below=0.0):
+    """
+    Rank the vertices of a batch of polylines for RDP simplification.
+
+    RDP is run on all polylines at once, one level at a time: every open span of
+    every polyline is handled in the same array pass, with a segmented argmax
+    over the spans. The number of Python iterations is the depth of the RDP
+    recursion, not the number of vertices.
+
+    :param vertices: (M, 2) array of all polyline vertices.
+    :param offsets: (K + 1,) array, polyline k is vertices[offsets[k]:offsets[k + 1]].
+    :param stop_below: Spans whose farthest vertex is within this tolerance are
+        not split further, their remaining vertices keep rank 0. The default
+        only stops at spans that are exactly straight, where the ranks are 0
+        anyway, so dense collinear runs don't cost one RDP level per vertex.
+    :return: (ranks, depths), (M,) arrays. Endpoints rank inf and interior
+        vertices hold the tolerance below which they are kept. depths is the
+        RDP level at which each vertex was ranked, endpoints are level 0 and
+        vertices of spans that were not split come after every ranked level.
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    offsets = np.asarray(offsets)
+    ranks = np.zeros(len(vertices))
+    depths = np.full(len(vertices), np.iinfo(int).max)
+    first, last = offsets[:-1], offsets[1:] - 1
+    nonempty = last >= first
+    ranks[first[nonempty]] = ranks[last[nonempty]] = np.inf
+    depths[first[nonempty]] = depths[last[nonempty]] = 0
+
+    # Open spans (i, j) with the rank of the vertex that split their parent span
+    i, j = first, last
+    parent_rank = np.full(len(i), np.inf)
+    depth = 1
+    while True:
+        open_spans = j - i >= 2
+        i, j, parent_rank = i[open_spans], j[open_spans], parent_rank[open_spans]
+        if len(i) == 0:
+            break
+
+        # All interior vertices of all open spans, laid out span after span
+        lengths = j - i - 1
+        span_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        span_of = np.repeat(np.arange(len(i)), lengths)
+        interior = np.arange(lengths.sum()) - span_starts[span_of] + i[span_of] + 1
+        distances = segment_distances(vertices[interior], vertices[i][span_of], vertices[j][span_of])
+
+        # Segmented argmax, the first vertex of each span at its span's maximum
+        max_distances = np.maximum.reduceat(distances, span_starts)
+        at_max = np.flatnonzero(distances == max_distances[span_of])
+        first_at_max = np.concatenate(([True], np.diff(span_of[at_max]) != 0))
+        k = interior[at_max[first_at_max]]
+
+        rank = np.minimum(max_distances, parent_rank)
+        ranks[k] = rank
+        depths[k] = depth
+
+        split = max_distances > stop_below
+        i, j = np.concatenate((i[split], k[split])), np.concatenate((k[split], j[split]))
+        parent_rank = np.tile(rank[split], 2)
+        depth += 1
+    return ranks, depths
+
+
+def rdp_ranks(points):
+    """
+    Rank the vertices of a single polyline for RDP simplification.
+
+    :param points: (N, 2) array of polyline vertices.
+    :return: (N,) array, endpoints are inf and interior vertices hold the
+        tolerance below which they are kept.
+    """
+    return rank_polylines(points, [0, len(points)])[0]
+
+
+def simplify_polyline(points, tolerance):
+    """
+    Simplify a single polyline with RDP.
+
+    :param points: Sequence of (x, y) vertices.
+    :param tolerance: Maximum allowed deviation in canvas units.
+    :return: (N, 2) array of the remaining vertices.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(points) < 3:
+        return points
+    return points[rank_polylines(points, [0, len(points)], stop_below=tolerance)[0] > tolerance]
+
+
+def simplify_polylines(vertices, offsets, tolerance=None, vertex_budget=None, importance=None):
+    """
+    Simplify a batch of polylines under a tolerance and/or a total vertex budget.
+
+    :param vertices: (M, 2) array of all polyline vertices.
+    :param offsets: (K + 1,) array, polyline k is vertices[offsets[k]:offsets[k + 1]].
+    :param tolerance: Maximum allowed deviation in canvas units, or None.
+    :param vertex_budget: Maximum number of vertices to keep across all polylines,
+        or None. Endpoints are always kept, so the result may exceed a budget
+        smaller than 2 * K.
+    :param importance: Optional (K,) array of per-polyline weights. A vertex
+        competes for the budget with its rank multiplied by its polyline's weight.
+    :return: (vertices, offsets, error) where error is the largest deviation
+        introduced, in canvas units.
+    """
+    lengths = np.diff(offsets)
+    if len(vertices) == 0:
+        return vertices, offsets, 0.0
+
+    # Vertices at or below the tolerance are dropped anyway, so RDP stops there.
+    # Without a tolerance it still stops at straight spans, whose vertices rank 0.
+    ranks, depths = rank_polylines(vertices, offsets, stop_below=tolerance if tolerance is not None else 0.0)
+    keep = np.ones(len(vertices), dtype=bool)
+
+    if tolerance is not None:
+        keep &= ranks > tolerance
+
+    if vertex_budget is not None and np.count_nonzero(keep) > vertex_budget:
+        scores = ranks
+        if importance is not None:
+            finite = ~np.isinf(ranks)
+            scores = np.full(len(ranks), np.inf)
+            scores[finite] = ranks[finite] * np.repeat(importance, lengths)[finite]
+        scores = np.where(keep, scores, -1.0)
+        # Keep the highest scoring vertices, endpoints score inf and always make the cut.
+        # A vertex clamped to its parent's rank ties with it, shallower vertices win
+        # ties so a vertex is never kept without the one that split its span.
+        n_keep = max(vertex_budget, 2 * len(lengths))
+        top = np.lexsort((depths, -scores))[:n_keep]
+        keep = np.zeros(len(vertices), dtype=bool)
+        keep[top] = True
+
+    error = float(ranks[~keep].max()) if not keep.all() else 0.0
+    polyline_ids = np.repeat(np.arange(len(lengths)), lengths)
+    new_lengths = np.bincount(polyline_ids[keep], minlength=len(lengths))
+    new_offsets = np.concatenate(([0], np.cumsum(new_lengths))).astype(int)
+    return vertices[keep], new_offsets, error
+
+
+def simplify_frame(frame, tolerance=None, vertex_budget=None):
+    """
+    Simplify the polylines of a finalized frame.
+
+    The vertex budget covers the whole frame. Points, line endpoints and bezier
+    control points are fixed costs, whatever remains goes to the polylines.
+
+    :return: (frame, error) with a new Frame and the largest deviation introduced.
+    """
+    if vertex_budget is not None:
+        fixed = len(frame.points) + 2 * len(frame.lines) + 4 * len(frame.beziers)
+        vertex_budget = max(vertex_budget - fixed, 0)
+    vertices, offsets, error = simplify_polylines(
+        frame.polyline_vertices, frame.polyline_offsets,
+        tolerance=tolerance, vertex_budget=vertex_budget, importance=frame.polyline_importance)
+    return frame.replace(polyline_vertices=vertices, polyline_offsets=offsets), error
@@ -0,0 +1,164 @@
+"""
+Sprites for points and hotspots in DisplayQT.
+
+Points and hotspots only differ by position, so instead of building an
+ellipse item, pens and colors (and with fringing five more ellipses) for each
+one, every look is rendered once into a QPixmap. A circle and its glow are
+separate sprites: the glow is drawn under the lines like the fringes of
+draw_with_fringing, the circle above them. A circle's look is its size, stroke
+color, fill color and view scale, a glow's look its size, fringe color, fringe
+width and view scale. The pixmaps live in a small LRU cache, so looks that stop
+being used, for example after a color or config change or a window resize,
+are evicted.
+
+All circles of a frame are drawn by one SpriteBatch item and all glows by
+another, each blitting its sprites in one paint call.
+"""
+
+import math
+from collections import OrderedDict
+
+from PySide6.QtWidgets import QGraphicsItem
+from PySide6.QtCore import Qt, QPointF, QRectF
+from PySide6.QtGui import QPixmap, QPainter, QPen
+
+
+def new_sprite(extent, scale):
+    """
+    Return a transparent pixmap 2 * extent canvas units wide at the given scale,
+    and an antialiased painter on it.
+    """
+    side = max(math.ceil(2 * extent * scale), 1)
+    pixmap = QPixmap(side, side)
+    pixmap.setDevicePixelRatio(scale)
+    pixmap.fill(Qt.transparent)
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.Antialiasing)
+    return pixmap, painter
+
+
+def render_circle(size, stroke_color, fill_color, scale):
+    """
+    Render a filled circle into a transparent pixmap.
+
+    :param size: Diameter of the circle in canvas units.
+    :param scale: Device pixels per canvas unit, so the sprite stays sharp in a scaled view.
+    :return: (pixmap, extent), extent is the distance in canvas units from the
+        pixmap's top left corner to the circle's center.
+    """
+    extent = size / 2 + 1
+    pixmap, painter = new_sprite(extent, scale)
+    painter.setPen(QPen(stroke_color))
+    painter.setBrush(fill_color)
+    painter.drawEllipse(QRectF(extent - size / 2, extent - size / 2, size, size))
+    painter.end()
+    return pixmap, extent
+
+
+def render_glow(size, fringe_color, fringe_width, scale):
+    """
+    Render the glow around a circle into a transparent pixmap, the same rings
+    as DisplayQT.draw_with_fringing, widest and faintest first.
+
+    :return: (pixmap, extent) as for render_circle.
+    """
+    extent = size / 2 + fringe_width + 1
+    pixmap, painter = new_sprite(extent, scale)
+    painter.setBrush(Qt.NoBrush)
+    rect = QRectF(extent - size / 2, extent - size / 2, size, size)
+    for i in range(fringe_width, 0, -1):
+        painter.setOpacity((fringe_width - i + 1) / fringe_width)
+        painter.setPen(QPen(fringe_color, i * 2, Qt.SolidLine))
+        painter.drawEllipse(rect)
+    painter.end()
+    return pixmap, extent
+
+
+class SpriteCache:
+    """
+    SpriteCache is responsible for:
+    - Rendering a sprite the first time a look is asked for
+    - Keeping the most recently used sprites, evicting the least recently used one when full
+    """
+
+    def __init__(self, capacity):
+        """
+        :param capacity: Maximum number of sprites kept, circles and glows together.
+        """
+        self.capacity = capacity
+        self.sprites = OrderedDict()
+
+    def circle(self, size, stroke_color, fill_color, scale=1.0):
+        """
+        Return the (pixmap, extent) sprite of a circle, rendering it if it isn't cached.
+        """
+        key = ('circle', size, stroke_color.rgba(), fill_color.rgba(), scale)
+        return self.lookup(key, render_circle, size, stroke_color, fill_color, scale)
+
+    def glow(self, size, fringe_color, fringe_width, scale=1.0):
+        """
+        Return the (pixmap, extent) sprite of a circle's glow, rendering it if it isn't cached.
+        """
+        key = ('glow', size, fringe_color.rgba(), fringe_width, scale)
+        return self.lookup(key, render_glow, size, fringe_color, fringe_width, scale)
+
+    def lookup(self, key, render, *args):
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = render(*args)
+            self.sprites[key] = sprite
+            if len(self.sprites) > self.capacity:
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(key)
+        return sprite
+
+
+class SpriteBatch(QGraphicsItem):
+    """
+    SpriteBatch is a single scene item that draws every sprite added to it as a
+    pixmap blit, so a frame's points and hotspots cost one item and one paint call.
+    """
+
+    def __init__(self, bounds):
+        """
+        :param bounds: QRectF the sprites are drawn in, normally the canvas.
+        """
+        super().__init__()
+        self.bounds = bounds
+        # The blits only run when sprites were added, repaints reuse the cached result
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+        self.groups = []  # [pixmap, extent, positions, opacities], in drawing order
+
+    def add(self, sprite, positions, opacities=None):
+        """
+        Queue sprites to be drawn.
+
+        :param sprite: (pixmap, extent) from a SpriteCache.
+        :param positions: List of (x, y) centers.
+        :param opacities: Optional list of opacities, one per position.
+        """
+        pixmap, extent = sprite
+        if opacities is None:
+            opacities = [1.0] * len(positions)
+        if self.groups and self.groups[-1][0] is pixmap:
+            self.groups[-1][2].extend(positions)
+            self.groups[-1][3].extend(opacities)
+        else:
+            self.groups.append([pixmap, extent, list(positions), list(opacities)])
+        self.update()
+
+    def boundingRect(self):
+        return self.bounds
+
+    def paint(self, painter, option, widget=None):
+        base_opacity = current = painter.opacity()
+        for pixmap, extent, positions, opacities in self.groups:
+            for (x, y), opacity in zip(positions, opacities):
+                opacity *= base_opacity
+                if opacity != current:
+                    painter.setOpacity(opacity)
+                    current = opacity
+                painter.drawPixmap(QPointF(x - extent, y - extent), pixmap)
+        if current != base_opacity:
+            painter.setOpacity(base_opacity)
@@ -13,12 +13,17 @@ class DisplayWebClient {
     this.hotspots_on = config.hotspots_on;
 
     this.elements_array = [];
+    this.frame = null; // Last binary frame, kept as typed arrays for redrawing
 
     // handle resizing
     this.setupResizing();
 
-    // SocketIO connection setup
-    this.setupSocketIO()
+    // Connection setup, DisplayWebAsync serves the page with a plain websocket transport
+    if (this.config.transport === 'websocket') {
+      this.setupWebSocket()
+    } else {
+      this.setupSocketIO()
+    }
 
     // Set control listeners
     this.setupControlListeners()
@@ -42,6 +47,26 @@ class DisplayWebClient {
     });
   }
 
+  //
+  // WebSocket
+  //
+
+  setupWebSocket() {
+    this.ws = new WebSocket('ws://' + location.host + '/ws');
+    this.ws.binaryType = 'arraybuffer';
+    this.ws.onopen = () => this.onWebSocketOpen();
+    this.ws.onerror = (error) => this.onWebSocketError(error);
+    this.ws.onmessage = (event) => {
+      if (event.data instanceof ArrayBuffer) {
+        this.drawFrame(this.decodeFrame(event.data));
+      } else {
+        this.handleSocketMessage(JSON.parse(event.data));
+      }
+    };
+    // Reconnect if the server goes away
+    this.ws.onclose = () => setTimeout(() => this.setupWebSocket(), 1000);
+  }
+
   onWebSocketOpen() {
     console.log('WebSocket connection established');
   }
@@ -69,6 +94,9 @@ class DisplayWebClient {
       case 'drawCubicBezier':
         this.drawCubicBezier(data.params.points[0], data.params.points[1], data.params.points[2], data.params.points[3]);
         break;
+      case 'drawPolyline':
+        this.drawPolyline(data.params.points);
+        break;
       // Add more cases for other commands as needed
     }
   }
@@ -176,6 +204,7 @@ class DisplayWebClient {
     console.log('Starting new frame');
     this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
     this.elements_array = []; // Clear elements array
+    this.frame = null;
   }
 
   frameEnd() {
@@ -253,7 +282,108 @@ class DisplayWebClient {
     this.elements_array.push({ command: 'drawCubicBezier', params: { points: [p0, p1, p2, p3] } });
   }
 
+  drawPolyline(points) {
+    console.log('Drawing polyline:', points);
+    // attributes
+    const color = `rgb(${this.config.default_stroke_color.join(',')})`;
+    this.ctx.strokeStyle = color;
+    this.ctx.lineWidth = this.scaleNum(this.config.default_stroke_width);
+    this.addFringing()
+    // draw
+    this.ctx.beginPath();
+    points.forEach((point, i) => {
+      const scaledPoint = this.scaleVirtual(point);
+      if (i === 0) {
+        this.ctx.moveTo(scaledPoint.x, scaledPoint.y);
+      } else {
+        this.ctx.lineTo(scaledPoint.x, scaledPoint.y);
+      }
+    });
+    this.ctx.stroke();
+    // store
+    this.elements_array.push({ command: 'drawPolyline', params: { points } });
+  }
+
+  decodeFrame(buffer) {
+    // Binary frame in the render node FRAME format, see render_protocol.py.
+    // Counts are big-endian, the arrays are little-endian views on the buffer.
+    const view = new DataView(buffer);
+    const [points, lines, beziers, polylines, vertices, styles] = [0, 1, 2, 3, 4, 5].map((i) => view.getUint32(i * 4));
+    let position = 24;
+    const take = (ArrayType, count) => {
+      const array = new ArrayType(buffer, position, count);
+      position += array.byteLength;
+      return array;
+    };
+    return {
+      styles: take(Float32Array, styles * 5),
+      points: take(Float32Array, points * 2),
+      lines: take(Float32Array, lines * 4),
+      beziers: take(Float32Array, beziers * 8),
+      vertices: take(Float32Array, vertices * 2),
+      offsets: take(Uint32Array, polylines + 1),
+      pointStyles: take(Uint16Array, points),
+      lineStyles: take(Uint16Array, lines),
+      bezierStyles: take(Uint16Array, beziers),
+      polylineStyles: take(Uint16Array, polylines),
+    };
+  }
+
+  drawFrame(frame) {
+    // Draw straight from the typed arrays, no per-primitive objects
+    this.frameStart();
+    this.frame = frame;
+    const scaleX = this.canvas.width / this.config.canvas_size[0];
+    const scaleY = this.canvas.height / this.config.canvas_size[1];
+    const ctx = this.ctx;
+    const setStyle = (style) => {
+      const [r, g, b, a, width] = frame.styles.subarray(style * 5, style * 5 + 5);
+      ctx.strokeStyle = ctx.fillStyle = `rgba(${r},${g},${b},${a / 255})`;
+      ctx.lineWidth = this.scaleNum(width);
+    };
+    this.addFringing();
+
+    const pointRadius = this.scaleNum(this.config.point_size) / 2;
+    for (let i = 0; i < frame.pointStyles.length; i++) {
+      setStyle(frame.pointStyles[i]);
+      ctx.beginPath();
+      ctx.arc(frame.points[2 * i] * scaleX, frame.points[2 * i + 1] * scaleY, pointRadius, 0, 2 * Math.PI);
+      ctx.fill();
+    }
+    for (let i = 0; i < frame.lineStyles.length; i++) {
+      const l = frame.lines.subarray(4 * i, 4 * i + 4);
+      setStyle(frame.lineStyles[i]);
+      ctx.beginPath();
+      ctx.moveTo(l[0] * scaleX, l[1] * scaleY);
+      ctx.lineTo(l[2] * scaleX, l[3] * scaleY);
+      ctx.stroke();
+    }
+    for (let i = 0; i < frame.bezierStyles.length; i++) {
+      const c = frame.beziers.subarray(8 * i, 8 * i + 8);
+      setStyle(frame.bezierStyles[i]);
+      ctx.beginPath();
+      ctx.moveTo(c[0] * scaleX, c[1] * scaleY);
+      ctx.bezierCurveTo(c[2] * scaleX, c[3] * scaleY, c[4] * scaleX, c[5] * scaleY, c[6] * scaleX, c[7] * scaleY);
+      ctx.stroke();
+    }
+    for (let i = 0; i < frame.polylineStyles.length; i++) {
+      const v = frame.vertices;
+      setStyle(frame.polylineStyles[i]);
+      ctx.beginPath();
+      ctx.moveTo(v[2 * frame.offsets[i]] * scaleX, v[2 * frame.offsets[i] + 1] * scaleY);
+      for (let j = frame.offsets[i] + 1; j < frame.offsets[i + 1]; j++) {
+        ctx.lineTo(v[2 * j] * scaleX, v[2 * j + 1] * scaleY);
+      }
+      ctx.stroke();
+    }
+    this.frameEnd();
+  }
+
   redrawElements() {
+    if (this.frame) {
+      this.drawFrame(this.frame);
+      return;
+    }
     this.elements_array.forEach(item => {
       switch (item.command) {
         case 'drawPoint':
@@ -265,6 +395,9 @@ class DisplayWebClient {
         case 'drawCubicBezier':
           this.drawCubicBezier(item.params.points[0], item.params.points[1], item.params.points[2], item.params.points[3]);
           break;
+        case 'drawPolyline':
+          this.drawPolyline(item.params.points);
+          break;
       }
     });
   }
@@ -0,0 +1,81 @@
+import os
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import QColor, QImage, QPainter
+from PySide6.QtWidgets import QApplication, QGraphicsLineItem
+
+import config
+import render_protocol as protocol
+from clipping import clip_frame
+from display_qt import DisplayQT
+from frame import Frame
+
+
+def sample_frame():
+    frame = Frame()
+    frame.add_point((100, 100))
+    frame.set_style((255, 0, 0, 255), 4)
+    frame.add_line((-50, 200), (400, 200))  # Crosses the canvas edge, so clipping rebuilds the arrays
+    frame.add_line((200, 50), (200, 400))
+    frame.add_cubic_bezier((300, 300), (350, 250), (400, 350), (450, 300))
+    frame.add_polyline([(500, 500), (600, 550), (700, 500)])
+    return frame.finalize()
+
+
+class TestDrawFrame(unittest.TestCase):
+    """
+    Frames built from arrays (clipped, simplified, tiled or decoded) have no
+    recording buffers, draw_frame and the hotspot pass must read them as they are.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+        cls.display = DisplayQT(*config.QT["canvas_size"])
+
+    def assert_draws_with_hotspots(self, frame):
+        self.display.draw_frame(frame)
+        self.assertIs(self.display.frame, frame)
+        hotspots = sum(len(positions) for _, _, positions, _ in self.display.sprite_batch.groups)
+        self.assertGreater(hotspots, len(frame.points))
+
+    def test_clipped_frame(self):
+        bounds = (0, 0) + config.QT["canvas_size"]
+        self.assert_draws_with_hotspots(clip_frame(sample_frame(), bounds))
+
+    def test_decoded_frame(self):
+        frame = protocol.decode_frame(protocol.encode_frame(sample_frame()))
+        self.assert_draws_with_hotspots(frame)
+
+    def test_stroke_width_from_style(self):
+        frame = protocol.decode_frame(protocol.encode_frame(sample_frame()))
+        self.display.draw_frame(frame)
+        lines = [item for item in self.display.scene.items()
+                 if isinstance(item, QGraphicsLineItem) and item.zValue() != config.QT["fringe_z_value"]]
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(all(line.pen().widthF() == 4 for line in lines))
+
+    def test_hotspot_glow_under_lines(self):
+        frame = Frame()
+        frame.set_style((0, 255, 0, 255), 2)
+        frame.add_line((100, 300), (900, 300))
+        self.display.draw_frame(frame.finalize())
+
+        image = QImage(*config.QT["canvas_size"], QImage.Format_ARGB32)
+        image.fill(0)
+        painter = QPainter(image)
+        self.display.scene.render(painter)
+        painter.end()
+
+        # The hotspot is drawn over the line end, its glow around it but under the line
+        hotspot, on_line, beside_line = (QColor(image.pixel(x, y)) for x, y in ((100, 300), (106, 300), (100, 305)))
+        self.assertEqual(hotspot.getRgb()[:3], config.QT["default_stroke_color"])
+        self.assertEqual(on_line.getRgb()[:3], (0, 255, 0))
+        if self.display.color_fringing_on:
+            self.assertGreater(beside_line.blue(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from hotspots import cluster_points, segment_intersections
+
+
+class TestClusterPoints(unittest.TestCase):
+
+    def test_chain_within_radius_merges(self):
+        centroids, counts = cluster_points([[0, 0], [3, 0], [6, 0]], 4)
+        np.testing.assert_array_equal(counts, [3])
+        np.testing.assert_allclose(centroids, [[3, 0]])
+
+    def test_same_cell_beyond_radius_stays_apart(self):
+        _, counts = cluster_points([[0, 0], [3.9, 3.9]], 4)
+        np.testing.assert_array_equal(counts, [1, 1])
+
+
+class TestSegmentIntersections(unittest.TestCase):
+
+    def test_crossing_segments(self):
+        np.testing.assert_allclose(segment_intersections([[0, 0, 10, 10], [0, 10, 10, 0]]), [[5, 5]])
+
+    def test_only_on_both_segments(self):
+        # The first segment's line passes through the second, the segments don't meet
+        self.assertEqual(len(segment_intersections([[0, 0, 10, 0], [20, -5, 20, 5]])), 0)
+        self.assertEqual(len(segment_intersections([[0, 0, 10, 0], [5, 1, 5, 5]])), 0)
+
+    def test_parallel_segments(self):
+        self.assertEqual(len(segment_intersections([[0, 0, 10, 0], [0, 1, 10, 1]])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+import numpy as np
+
+from simplify import rank_polylines, simplify_polylines
+
+
+class TestStraightPolylines(unittest.TestCase):
+    """
+    Straight runs have nothing to rank, RDP must not split them one vertex per level.
+    """
+
+    def setUp(self):
+        x = np.linspace(0, 1000, 20000)
+        self.vertices = np.column_stack((x, 2 * x))
+        self.offsets = np.array([0, len(x)])
+
+    def test_dense_straight_polyline_stops_early(self):
+        ranks, depths = rank_polylines(self.vertices, self.offsets)
+        self.assertTrue(np.all(ranks[1:-1] < 1e-9))
+        ranked = depths < np.iinfo(depths.dtype).max
+        self.assertLess(depths[ranked].max(), 64)
+
+    def test_dense_straight_polyline_under_budget(self):
+        vertices, offsets, error = simplify_polylines(self.vertices, self.offsets, vertex_budget=10)
+        self.assertEqual(len(vertices), 10)
+        np.testing.assert_array_equal(vertices[[0, -1]], self.vertices[[0, -1]])
+        self.assertLess(error, 1e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()
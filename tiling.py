@@ -0,0 +1,137 @@
+"""
+Tiled multi-display rendering.
+
+The virtual canvas is split into a grid of tiles, each bound to one display
+(for example one projector of a wall). Every tile owns a region of the canvas
+plus an overlap shared with its neighbours for edge blending, and maps that
+area onto its display's own canvas with a viewport transform. Every tile has
+the same extent, the overlap is kept at the canvas edge too, and the same
+uniform scale, so geometry crossing a seam lands in the same place on both
+projectors and circles stay round.
+
+Routing uses the grid itself as the spatial index: each primitive's bounding
+box is turned into a range of tile columns and rows, so a display only gets the
+primitives that touch it. Lines and polylines are then split at the tile
+boundary, beziers are sent whole to every tile they touch and left for the
+display to clip.
+"""
+
+import numpy as np
+from clipping import points_visible, clip_lines, bezier_boxes, polyline_boxes, clip_polylines
+
+
+class Tile:
+    """
+    A region of the virtual canvas bound to one display.
+    """
+
+    def __init__(self, region, bounds, output_size):
+        """
+        :param region: (xmin, ymin, xmax, ymax) of the canvas this tile owns.
+        :param bounds: The region grown by the overlap, this is what the tile shows.
+        :param output_size: (width, height) of the display canvas the bounds map onto.
+            The bounds are scaled uniformly to fit and centered, if the aspect
+            ratios differ the display is letterboxed.
+        """
+        self.region = region
+        self.bounds = bounds
+        self.output_size = output_size
+
+        # Viewport transform, canvas coordinates to display coordinates
+        xmin, ymin, xmax, ymax = bounds
+        extent = np.array([xmax - xmin, ymax - ymin], dtype=float)
+        self.offset = np.array([xmin, ymin], dtype=float)
+        self.scale = min(output_size[0] / extent[0], output_size[1] / extent[1])
+        self.margin = (np.asarray(output_size, dtype=float) - extent * self.scale) / 2
+
+    def to_display(self, points):
+        """
+        Apply the viewport transform to an array whose rows are flattened (x, y) pairs.
+        """
+        shape = points.shape
+        return ((points.reshape(-1, 2) - self.offset) * self.scale + self.margin).reshape(shape)
+
+    def render(self, frame):
+        """
+        Clip an already routed frame to the tile bounds and transform it to display coordinates.
+        """
+        visible = frame.select(points=points_visible(frame.points, self.bounds))
+        lines, keep = clip_lines(frame.lines, self.bounds)
+        vertices, offsets, source = clip_polylines(frame.polyline_vertices, frame.polyline_offsets, self.bounds)
+        return visible.replace(
+            points=self.to_display(visible.points),
+            lines=self.to_display(lines), line_styles=frame.line_styles[keep],
+            beziers=self.to_display(frame.beziers),
+            polyline_vertices=self.to_display(vertices), polyline_offsets=offsets,
+            polyline_importance=frame.polyline_importance[source], polyline_styles=frame.polyline_styles[source])
+
+
+class TileGrid:
+    """
+    Splits the virtual canvas into cols x rows tiles and routes frames to them.
+    """
+
+    def __init__(self, canvas_size, cols, rows, overlap=0, output_size=None):
+        """
+        :param canvas_size: (width, height) of the virtual canvas.
+        :param cols: Number of tile columns.
+        :param rows: Number of tile rows.
+        :param overlap: Canvas units each tile extends into its neighbours. Tiles
+            at the canvas edge extend past it by the same amount, so all tiles
+            share one extent and scale.
+        :param output_size: (width, height) of the display canvases, defaults to canvas_size.
+        """
+        self.canvas_width, self.canvas_height = canvas_size
+        self.cols = cols
+        self.rows = rows
+        self.overlap = overlap
+        self.tile_width = self.canvas_width / cols
+        self.tile_height = self.canvas_height / rows
+        output_size = output_size or canvas_size
+
+        # Tiles are stored row by row, tile index is row * cols + col
+        self.tiles = []
+        for row in range(rows):
+            for col in range(cols):
+                region = (col * self.tile_width, row * self.tile_height,
+                          (col + 1) * self.tile_width, (row + 1) * self.tile_height)
+                bounds = (region[0] - overlap, region[1] - overlap, region[2] + overlap, region[3] + overlap)
+                self.tiles.append(Tile(region, bounds, output_size))
+
+    def tile_ranges(self, mins, maxs):
+        """
+        Return the first and last tile column and row touched by each bounding box.
+        """
+        size = np.array([self.tile_width, self.tile_height])
+        limit = np.array([self.cols - 1, self.rows - 1])
+        first = np.clip(np.floor((mins - self.overlap) / size), 0, limit).astype(int)
+        last = np.clip(np.floor((maxs + self.overlap) / size), 0, limit).astype(int)
+        return first, last
+
+    def route(self, frame, tile_indices=None):
+        """
+        Split a finalized frame into one frame per tile, in display coordinates.
+
+        :param frame: A finalized Frame in canvas coordinates.
+        :param tile_indices: Tiles to route to, defaults to all of them.
+        :return: Dict mapping tile index to its Frame.
+        """
+        if tile_indices is None:
+            tile_indices = range(len(self.tiles))
+
+        # Bounding box of every primitive, bucketed into the tile grid once
+        lines = frame.lines.reshape(-1, 2, 2)
+        ranges = {
+            'points': self.tile_ranges(frame.points, frame.points),
+            'lines': self.tile_ranges(lines.min(axis=1), lines.max(axis=1)),
+            'beziers': self.tile_ranges(*bezier_boxes(frame.beziers)),
+            'polylines': self.tile_ranges(*polyline_boxes(frame.polyline_vertices, frame.polyline_offsets)),
+        }
+
+        routed = {}
+        for index in tile_indices:
+            cell = np.array([index % self.cols, index // self.cols])
+            touches = {kind: np.all((first <= cell) & (cell <= last), axis=1) for kind, (first, last) in ranges.items()}
+            subset = frame.select(**touches)
+            routed[index] = self.tiles[index].render(subset)
+        return routed
@@ -1,3 +1,10 @@
+import math
+import time
+import config
+from concurrent.futures import ThreadPoolExecutor
+from interpolation import Keyframe, interpolate
+
+
 class VisualComposer:
     """
     VisualComposer acts as the high-level graphics engine. It manages and orchestrates 
@@ -20,8 +27,161 @@ class VisualComposer:
         """
         self.basic_renderer = basic_renderer
 
+        # Pattern generator and the keyframes evaluated from it, as futures by keyframe index.
+        # The generator runs ahead on a worker thread so it never holds up a display frame.
+        self.generator = None
+        self.keyframe_rate = config.COMPOSER["keyframe_rate"]
+        self.interpolation = config.COMPOSER["interpolation"]
+        self.keyframes = {}
+        self.held_keyframe = None  # Last keyframe drawn, held while the generator catches up
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
     # Methods for transformations, effects, grouping, etc., will be added here.
 
+    def set_level_of_detail(self, tolerance=None, vertex_budget=None):
+        """
+        Bound the cost of each frame by simplifying polylines in the renderer.
+
+        :param tolerance: Maximum deviation in canvas units, or None.
+        :param vertex_budget: Maximum number of vertices per frame, or None.
+        """
+        self.basic_renderer.set_level_of_detail(tolerance, vertex_budget)
+
+    def level_of_detail_error(self):
+        """
+        Return the largest deviation, in canvas units, introduced in the last frame.
+        """
+        return self.basic_renderer.simplify_error
+
+    def set_generator(self, generator, keyframe_rate=None, interpolation=None):
+        """
+        Set the pattern generator. It is only evaluated at the keyframe rate, frames
+        in between are interpolated so the displays can run at a higher frame rate.
+        The generator is called on a worker thread, one keyframe at a time, ahead
+        of when the keyframe is needed.
+
+        :param generator: Callable taking a time in seconds and returning a scene,
+            a dict mapping primitive id to (kind, coords) with kind one of 'point',
+            'line', 'bezier' or 'polyline'.
+        :param keyframe_rate: Keyframes per second.
+        :param interpolation: 'linear', 'eased' or 'spline'.
+        """
+        self.generator = generator
+        self.keyframe_rate = keyframe_rate or self.keyframe_rate
+        self.interpolation = interpolation or self.interpolation
+        for future in self.keyframes.values():
+            future.cancel()  # Keyframes of the previous generator that haven't started
+        self.keyframes = {}
+        self.held_keyframe = None
+
+    def request_keyframe(self, index):
+        """
+        Return the future of the keyframe with the given index, queueing its evaluation if needed.
+        """
+        if index not in self.keyframes:
+            self.keyframes[index] = self.executor.submit(self.evaluate_keyframe, self.generator, index)
+        return self.keyframes[index]
+
+    def evaluate_keyframe(self, generator, index):
+        t = index / self.keyframe_rate
+        return Keyframe(t, generator(t))
+
+    def keyframe(self, index):
+        """
+        Return the keyframe with the given index, waiting for it if it isn't evaluated yet.
+        """
+        return self.request_keyframe(index).result()
+
+    def ready_keyframe(self, index):
+        """
+        Return the keyframe with the given index if it is evaluated, None otherwise.
+        """
+        future = self.request_keyframe(index)
+        return future.result() if future.done() and not future.cancelled() else None
+
+    def newest_ready_keyframe(self, index):
+        """
+        Return the latest evaluated keyframe at or before index, or the held keyframe if there is none.
+        """
+        ready = [i for i, future in self.keyframes.items()
+                 if i <= index and future.done() and not future.cancelled()]
+        return self.keyframes[max(ready)].result() if ready else self.held_keyframe
+
+    def render(self, t):
+        """
+        Draw the scene at time t, interpolated between the surrounding keyframes.
+        """
+        position = max(t * self.keyframe_rate, 0.0)
+        index = math.floor(position)
+        u = position - index
+
+        # Queue the keyframes of the next interval now, so they are evaluated while this one plays
+        lookahead = 3 if self.interpolation == 'spline' else 2
+        for i in range(index, index + lookahead + 1):
+            self.request_keyframe(i)
+
+        # Interpolate with what is ready. If the generator is behind, the newest ready
+        # keyframe is held until it catches up. Only the very first keyframe is waited for.
+        k0 = self.ready_keyframe(index)
+        k1 = self.ready_keyframe(index + 1) if k0 is not None else None
+        if k0 is None:
+            k0 = self.newest_ready_keyframe(index)
+            if k0 is None:
+                k0 = self.keyframe(index)
+        if k1 is None:
+            k1, u = k0, 0.0
+        self.held_keyframe = k0
+        k_prev = k_next = None
+        if self.interpolation == 'spline':
+            k_prev = self.ready_keyframe(index - 1) if index > 0 else None
+            k_next = self.ready_keyframe(index + 2)
+
+        # Forget keyframes that are behind us. The ones that haven't started are cancelled,
+        # the one being evaluated is kept so it can be held once it is ready.
+        newest = max((i for i, future in self.keyframes.items() if future.done() and not future.cancelled()),
+                     default=None)
+        for old in [i for i in self.keyframes if i < index - 1]:
+            future = self.keyframes[old]
+            if future.cancel() or (future.done() and old != newest):
+                del self.keyframes[old]
+
+        groups = interpolate(k0, k1, u, self.interpolation, k_prev, k_next)
+        renderer = self.basic_renderer
+        renderer.frame_start()
+        stroke_color = renderer.stroke_color
+        for kind, coords, opacity in groups:
+            # Fading primitives are drawn with their alpha scaled
+            r, g, b, a = stroke_color
+            renderer.set_stroke_color(r, g, b, round(a * opacity))
+            for vertices in coords.tolist():
+                if kind == 'point':
+                    renderer.draw_point(vertices[0])
+                elif kind == 'line':
+                    renderer.draw_line(*vertices)
+                elif kind == 'bezier':
+                    renderer.draw_cubic_bezier(*vertices)
+                elif kind == 'polyline':
+                    renderer.draw_polyline(vertices)
+        renderer.set_stroke_color(*stroke_color)
+        renderer.frame_end()
+
+    def run(self, duration=None, frame_rate=None):
+        """
+        Render frames at frame_rate until duration seconds have passed (forever if None).
+        """
+        frame_interval = 1 / (frame_rate or config.COMPOSER["frame_rate"])
+        start = time.perf_counter()
+        next_frame = start
+        while duration is None or next_frame - start < duration:
+            self.render(next_frame - start)
+            next_frame += frame_interval
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Running late, skip ahead rather than trying to catch up
+                next_frame = time.perf_counter()
+
 if __name__ == "__main__":
     # Code here will only run when the script is executed directly,
     # not when the script is imported as a module in another file